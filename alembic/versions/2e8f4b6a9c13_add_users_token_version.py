@@ -0,0 +1,28 @@
+"""add users.token_version
+
+Revision ID: 2e8f4b6a9c13
+Revises: 7c3e9a1d5b20
+Create Date: 2026-10-18 14:05:31.487215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e8f4b6a9c13'
+down_revision: Union[str, Sequence[str], None] = '7c3e9a1d5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
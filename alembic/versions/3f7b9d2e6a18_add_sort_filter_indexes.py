@@ -0,0 +1,50 @@
+"""add indexes for server-side sorting and filtering of list pages
+
+Revision ID: 3f7b9d2e6a18
+Revises: 8c4f2a6d1e37
+Create Date: 2026-10-18 18:05:37.204118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f7b9d2e6a18'
+down_revision: Union[str, Sequence[str], None] = '8c4f2a6d1e37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns) -- keep in sync with __table_args__ in app/models.py
+INDEXES = [
+    ('ix_tasks_status_created_at_id', 'tasks', ['status', 'created_at', 'id']),
+    ('ix_tasks_title_id', 'tasks', ['title', 'id']),
+    ('ix_users_role_name', 'users', ['role', 'name']),
+    # nullable sort columns, sorted with NULL as the column default
+    ('ix_tasks_assigned_to_id_status_sort', 'tasks', ['assigned_to_id', sa.text("coalesce(status, 'pending')"), 'id']),
+    ('ix_tasks_assigned_to_id_hours_sort', 'tasks', ['assigned_to_id', sa.text('coalesce(hours_spent, 0)'), 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, unique=False, if_not_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
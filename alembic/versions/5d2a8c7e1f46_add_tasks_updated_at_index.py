@@ -0,0 +1,37 @@
+"""add tasks.updated_at index for page ETag watermarks
+
+Revision ID: 5d2a8c7e1f46
+Revises: 9b1d7e3f5a24
+Create Date: 2026-10-18 16:02:51.118374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a8c7e1f46'
+down_revision: Union[str, Sequence[str], None] = '9b1d7e3f5a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('ix_tasks_updated_at', 'tasks', ['updated_at'], unique=False, if_not_exists=True,
+                            postgresql_concurrently=True)
+    else:
+        op.create_index('ix_tasks_updated_at', 'tasks', ['updated_at'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_tasks_updated_at', table_name='tasks', if_exists=True, postgresql_concurrently=True)
+    else:
+        op.drop_index('ix_tasks_updated_at', table_name='tasks', if_exists=True)
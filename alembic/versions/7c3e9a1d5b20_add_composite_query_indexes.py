@@ -0,0 +1,59 @@
+"""add composite indexes matching the route query shapes
+
+Revision ID: 7c3e9a1d5b20
+Revises: 4621940f2b59
+Create Date: 2026-10-18 10:12:44.201937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e9a1d5b20'
+down_revision: Union[str, Sequence[str], None] = '4621940f2b59'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns) -- keep in sync with __table_args__ in app/models.py
+INDEXES = [
+    ('ix_tasks_assigned_by_id_created_at', 'tasks', ['assigned_by_id', 'created_at']),
+    ('ix_tasks_assigned_to_id_status', 'tasks', ['assigned_to_id', 'status']),
+    ('ix_tasks_created_at_id', 'tasks', ['created_at', 'id']),
+    ('ix_users_created_by_id_created_at', 'users', ['created_by_id', 'created_at']),
+    ('ix_users_role_created_at', 'users', ['role', 'created_at']),
+    ('ix_task_history_updated_by_id', 'task_history', ['updated_by_id']),
+    ('ix_task_reassigns_reassigned_by_id_timestamp', 'task_reassigns', ['reassigned_by_id', 'timestamp']),
+    ('ix_task_reassigns_timestamp_id', 'task_reassigns', ['timestamp', 'id']),
+]
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _is_postgres():
+        # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, unique=False, if_not_exists=True,
+                                postgresql_concurrently=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            for name, table, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
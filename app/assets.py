@@ -0,0 +1,193 @@
+"""Fingerprinted, precompressed static files.
+
+`python -m app.assets` builds static/ into STATIC_BUILD_DIR:
+
+  - every file is copied as-is and as name.<content hash>.ext
+  - text files also get .gz and .br siblings when that makes them smaller
+  - manifest.json maps "css/style.css" to "css/style.3f9a0c1d2b7e.css"
+
+The static() template global then points at the hashed names, which are
+served with a year-long immutable Cache-Control. Without a build (or when
+static/ has changed since the last one) files are served straight from
+static/ and revalidated on every use.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import sys
+
+import anyio
+import brotli
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = "static"
+STATIC_BUILD_DIR = os.getenv("STATIC_BUILD_DIR", "static_build")
+MANIFEST = "manifest.json"
+
+COMPRESSIBLE = {".css", ".js", ".svg", ".html", ".json", ".txt", ".map"}
+# preferred first when the client accepts both
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+# ---------------- Build ----------------
+def _source_files(src: str):
+    for root, _, files in sorted(os.walk(src)):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, src).replace(os.sep, "/"), path
+
+
+def source_fingerprint(src: str = STATIC_DIR) -> str:
+    """Changes whenever a file under static/ is added, removed or edited."""
+    h = hashlib.blake2b(digest_size=8)
+    for rel, path in _source_files(src):
+        stat = os.stat(path)
+        h.update(f"{rel}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return h.hexdigest()
+
+
+def hashed_name(rel: str, data: bytes) -> str:
+    stem, ext = os.path.splitext(rel)
+    return f"{stem}.{hashlib.blake2b(data, digest_size=6).hexdigest()}{ext}"
+
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _write_variants(out: str, rel: str, data: bytes):
+    _write(os.path.join(out, rel), data)
+    if os.path.splitext(rel)[1] not in COMPRESSIBLE:
+        return
+    # mtime=0 keeps the .gz bytes identical between builds
+    for suffix, compressed in ((".gz", gzip.compress(data, compresslevel=9, mtime=0)),
+                               (".br", brotli.compress(data, quality=11))):
+        if len(compressed) < len(data):
+            _write(os.path.join(out, rel + suffix), compressed)
+
+
+def build(src: str = STATIC_DIR, out: str = STATIC_BUILD_DIR) -> dict:
+    """Rebuild `out` from `src` and return the manifest."""
+    fingerprint = source_fingerprint(src)
+    staging = f"{out}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    files = {}
+    for rel, path in _source_files(src):
+        with open(path, "rb") as f:
+            data = f.read()
+        files[rel] = hashed_name(rel, data)
+        _write_variants(staging, rel, data)
+        _write_variants(staging, files[rel], data)
+    manifest = {"source": fingerprint, "files": files}
+    _write(os.path.join(staging, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    # swap the finished build in so a running server never sees half of one
+    shutil.rmtree(out, ignore_errors=True)
+    os.replace(staging, out)
+    return manifest
+
+
+def load_manifest(src: str = STATIC_DIR, out: str = STATIC_BUILD_DIR):
+    """The build's manifest if it exists and matches static/, else None."""
+    try:
+        with open(os.path.join(out, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("source") != source_fingerprint(src):
+        logger.warning("%s is older than %s/; serving unhashed files until `python -m app.assets` is run", out, src)
+        return None
+    return manifest
+
+
+# ---------------- Serving ----------------
+def accepted_encodings(accept_encoding: str) -> set:
+    """Content codings an Accept-Encoding header allows (q=0 excluded)."""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class AssetFiles(StaticFiles):
+    """StaticFiles that picks a precompressed variant and sets Cache-Control.
+
+    Hashed names never change content, so they are cached for a year as
+    immutable; anything else must be revalidated (ETag / Last-Modified).
+    """
+
+    def __init__(self, *, directory: str, hashed=(), **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.hashed = set(hashed)
+
+    async def get_response(self, path: str, scope):
+        response = await self._encoded_response(path, scope) or await super().get_response(path, scope)
+        if response.status_code in (200, 206, 304):
+            rel = path.replace(os.sep, "/")
+            response.headers["Cache-Control"] = IMMUTABLE if rel in self.hashed else REVALIDATE
+            if os.path.splitext(rel)[1] in COMPRESSIBLE:
+                response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    async def _encoded_response(self, path: str, scope):
+        if os.path.splitext(path)[1] not in COMPRESSIBLE or scope["method"] not in ("GET", "HEAD"):
+            return None
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result is None:
+                continue
+            # typed as the original file, not as .br/.gz
+            response = FileResponse(full_path, stat_result=stat_result, media_type=mimetypes.guess_type(path)[0])
+            response.headers["Content-Encoding"] = encoding
+            if self.is_not_modified(response.headers, Headers(scope=scope)):
+                return NotModifiedResponse(response.headers)
+            return response
+        return None
+
+
+# ---------------- App wiring ----------------
+# (not when run as the build script, which is about to replace the build)
+manifest = load_manifest() if __name__ != "__main__" else None
+
+
+def static_url(path: str) -> str:
+    """URL for a file under static/: the fingerprinted name when there is a build."""
+    path = path.lstrip("/")
+    if manifest:
+        path = manifest["files"].get(path, path)
+    return f"/static/{path}"
+
+
+def static_app() -> AssetFiles:
+    if manifest:
+        return AssetFiles(directory=STATIC_BUILD_DIR, hashed=manifest["files"].values())
+    return AssetFiles(directory=STATIC_DIR)
+
+
+if __name__ == "__main__":
+    built = build()
+    print(f"built {len(built['files'])} files into {STATIC_BUILD_DIR}/", file=sys.stderr)
@@ -1,22 +1,19 @@
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from jose import jwt, JWTError
-import os
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models
-from app.dependencies import get_db, get_current_user
+from app.dependencies import get_db, get_current_user, get_principal, Principal
+from app.revocation import revoked_tokens
+from app.passwords import pwd_context, password_pool
+from app import tokens
+from app.tokens import ACCESS_TOKEN_EXPIRE_MINUTES
 
 # ---------------- Password & JWT Setup ----------------
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token", auto_error=False)
 
 router = APIRouter(tags=["Auth"])
@@ -28,37 +25,58 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
+# Request handlers use these: bcrypt runs in the password worker pool
+async def hash_password_async(password: str) -> str:
+    return await password_pool.hash(password)
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    """User for these credentials, or None. Rehashes the stored password if the bcrypt cost changed."""
+    user = await db.scalar(select(models.User).where(models.User.username == username))
+    if not user:
+        return None
+    valid, new_hash = await password_pool.verify_and_update(password, user.password_hash)
+    if not valid:
+        return None
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+    return user
+
 # ---------------- JWT Token utils ----------------
+def token_claims(user: models.User) -> dict:
+    """Everything the role checks need, so requests can authorize without loading the user."""
+    return {"sub": user.username, "uid": user.id, "role": user.role.value, "ver": user.token_version}
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return tokens.encode(to_encode)
 
 # ---------------- Current User dependency ----------------
 # Reuse the get_current_user from app.dependencies which supports cookie fallback
-def get_current_user_dep(current_user: models.User = Depends(get_current_user)) -> models.User:
+async def get_current_user_dep(current_user: models.User = Depends(get_current_user)) -> models.User:
     return current_user
 
 # ---------------- Role-based dependencies ----------------
-def admin_required(current_user: models.User = Depends(get_current_user)):
+async def admin_required(current_user: Principal = Depends(get_principal)):
     if current_user.role != models.RoleEnum.admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     return current_user
 
-def manager_required(current_user: models.User = Depends(get_current_user)):
+async def manager_required(current_user: Principal = Depends(get_principal)):
     if current_user.role != models.RoleEnum.manager:
         raise HTTPException(status_code=403, detail="Manager access required")
     return current_user
 
-def employee_required(current_user: models.User = Depends(get_current_user)):
+async def employee_required(current_user: Principal = Depends(get_principal)):
     if current_user.role != models.RoleEnum.employee:
         raise HTTPException(status_code=403, detail="Employee access required")
     return current_user
 
 # ---------------- Logout ----------------
 @router.post("/logout", summary="Logout user")
-def logout_user(request: Request, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def logout_user(request: Request, current_user: Principal = Depends(get_principal), db: AsyncSession = Depends(get_db)):
     # read token from Authorization header or cookie
     token = None
     auth_header = request.headers.get("authorization")
@@ -72,8 +90,18 @@ def logout_user(request: Request, current_user: models.User = Depends(get_curren
     # Save token to revoked tokens table
     revoked_token = models.RevokedToken(token=token)
     db.add(revoked_token)
-    db.commit()
+    await db.commit()
+    revoked_tokens.add(token)
     # Clear cookie and redirect to login
     response = RedirectResponse(url="/login", status_code=303)
     response.delete_cookie("access_token", path="/")
     return response
+
+@router.post("/logout/all", summary="Logout user from every session")
+async def logout_all_sessions(current_user: models.User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    # tokens carry the version they were issued with, so bumping it revokes all of them
+    current_user.token_version += 1
+    await db.commit()
+    response = RedirectResponse(url="/login", status_code=303)
+    response.delete_cookie("access_token", path="/")
+    return response
@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+import zlib
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.assets import accepted_encodings
+
+# bodies smaller than this go out as they are
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+# per-response settings: fast enough for dynamic pages, unlike the max
+# levels the static build uses
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/javascript", "application/x-ndjson", "application/xml", "image/svg+xml",
+}
+NOT_COMPRESSED_STATUSES = {204, 206, 304}
+
+
+# ---------------- Compressors ----------------
+class _Gzip:
+    def __init__(self):
+        self._z = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 = gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        # ends the current block so what has been sent so far can be decoded
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self):
+        self._c = brotli.Compressor(quality=COMPRESS_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+# preferred first when the client accepts both
+COMPRESSORS = (("br", _Brotli), ("gzip", _Gzip))
+
+
+# ---------------- Metrics ----------------
+class CompressionMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = {encoding: 0 for encoding, _ in COMPRESSORS}
+        self.streamed = 0
+        self.skipped_small = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def record(self, bytes_in: int, bytes_out: int, cpu_seconds: float):
+        with self._lock:
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.cpu_seconds += cpu_seconds
+
+    def count(self, encoding: str, streamed: bool):
+        with self._lock:
+            self.responses[encoding] += 1
+            if streamed:
+                self.streamed += 1
+
+    def skip_small(self):
+        with self._lock:
+            self.skipped_small += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "responses": dict(self.responses),
+                "streamed": self.streamed,
+                "skipped_small": self.skipped_small,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                # compressed size / original size
+                "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+                "cpu_ms": round(self.cpu_seconds * 1000, 3),
+            }
+
+
+compression_metrics = CompressionMetrics()
+
+
+# ---------------- Middleware ----------------
+def _compressible(status: int, headers: Headers) -> bool:
+    if status < 200 or status in NOT_COMPRESSED_STATUSES or "content-encoding" in headers:
+        return False
+    if "no-transform" in headers.get("cache-control", ""):
+        return False
+    content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+
+def _add_vary(headers: MutableHeaders):
+    vary = headers.get("vary")
+    if not vary:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+class CompressionMiddleware:
+    """gzip/Brotli for text responses, compressed as they are sent.
+
+    A pure ASGI middleware: each body chunk is compressed and flushed as it
+    arrives, so StreamingResponse output (exports) is never buffered. Only
+    the first COMPRESS_MIN_SIZE bytes are held back, to decide whether the
+    body is worth compressing at all. Responses that already carry a
+    Content-Encoding (the precompressed static files) pass straight through.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        # with no usable encoding the response still gets its Vary header
+        encoding, compressor = next(((e, c) for e, c in COMPRESSORS if e in accepted), (None, None))
+        await self.app(scope, receive, _CompressingSend(send, encoding, compressor, self.minimum_size))
+
+
+class _CompressingSend:
+    def __init__(self, send, encoding: str, compressor, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.compressor_class = compressor
+        self.minimum_size = minimum_size
+        self.start = None
+        self.passthrough = False
+        self.pending = []
+        self.pending_size = 0
+        self.compressor = None
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            if _compressible(message["status"], headers):
+                _add_vary(headers)
+                if self.encoding:
+                    self.start = message  # held until we know the body is big enough
+                    return
+            self.passthrough = True
+            await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            self.pending.append(body)
+            self.pending_size += len(body)
+            if more_body and self.pending_size < self.minimum_size:
+                return
+            body = b"".join(self.pending)
+            self.pending = []
+            if not more_body and len(body) < self.minimum_size:
+                compression_metrics.skip_small()
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+            await self._begin(body, more_body)
+            return
+        await self.send({"type": "http.response.body", "body": self._compress(body, more_body), "more_body": more_body})
+
+    async def _begin(self, body: bytes, more_body: bool):
+        self.compressor = self.compressor_class()
+        compressed = self._compress(body, more_body)
+        headers = MutableHeaders(scope=self.start)
+        headers["Content-Encoding"] = self.encoding
+        if more_body:
+            # length unknown until the stream ends: chunked transfer
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(compressed))
+        compression_metrics.count(self.encoding, streamed=more_body)
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _compress(self, body: bytes, more_body: bool) -> bytes:
+        started = time.thread_time()
+        out = self.compressor.compress(body) + (self.compressor.flush() if more_body else self.compressor.finish())
+        compression_metrics.record(len(body), len(out), time.thread_time() - started)
+        return out
@@ -1,23 +1,74 @@
 from fastapi import Depends, HTTPException, status, Request
-from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.models import User, RoleEnum, RevokedToken
-import os
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import open_session
+from app.models import User, RoleEnum
+from app.revocation import revoked_tokens, token_versions
+from app.tokens import token_verifier, JWTError
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
-SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
-ALGORITHM = "HS256"
 
-def get_db():
-    db = SessionLocal()
+# ---------------- Request context ----------------
+class RequestContext:
+    """Session for a single request.
+
+    Created by the auth middleware in main.py and shared with get_db, so a
+    request opens at most one session (and only if something asks for it).
+    The middleware closes it when the response is done.
+    """
+
+    def __init__(self):
+        self._db = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = open_session()
+        return self._db
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+async def get_db(request: Request):
+    ctx = getattr(request.state, "ctx", None)
+    if ctx is not None:
+        # session is owned (and closed) by the middleware
+        yield ctx.db
+        return
+    db = open_session()
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+# ---------------- Principal ----------------
+class Principal:
+    """The authenticated caller, built from token claims alone (no DB row)."""
+
+    def __init__(self, id: int, username: str, role: RoleEnum, token_version: int):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.token_version = token_version
 
-def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    @classmethod
+    def from_claims(cls, claims: dict):
+        """None for tokens that don't carry the uid/role/ver claims."""
+        try:
+            return cls(int(claims["uid"]), claims["sub"], RoleEnum(claims["role"]), int(claims["ver"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+async def get_principal(request: Request, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Principal:
+    """Validate the token and return its principal.
+
+    Needs no SQL on the common path: revocation and the user's token
+    version are answered from in-process caches.
+    """
     # oauth2_scheme will attempt to read Authorization header; allow fallback to cookie
     if not token:
         token = request.cookies.get("access_token")
@@ -26,7 +77,7 @@ def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
     # Check if token is revoked
-    if db.query(RevokedToken).filter(RevokedToken.token == token).first():
+    if await revoked_tokens.is_revoked(token, db):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
 
     credentials_exception = HTTPException(
@@ -35,29 +86,35 @@ def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db:
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
+        principal = Principal.from_claims(token_verifier.decode(token))
     except JWTError:
         raise credentials_exception
+    if principal is None:
+        raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
+    # a bumped version (or a deleted user) revokes every older token
+    if await token_versions.get(principal.id, db) != principal.token_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+    return principal
+
+async def get_current_user(principal: Principal = Depends(get_principal), db: AsyncSession = Depends(get_db)) -> User:
+    """Full User row for the caller, for the few handlers that need more than the claims."""
+    user = await db.get(User, principal.id)
     if not user:
-        raise credentials_exception
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
     return user
 
-def admin_required(current_user: User = Depends(get_current_user)):
+async def admin_required(current_user: Principal = Depends(get_principal)):
     if current_user.role != RoleEnum.admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     return current_user
 
-def manager_required(current_user: User = Depends(get_current_user)):
+async def manager_required(current_user: Principal = Depends(get_principal)):
     if current_user.role != RoleEnum.manager:
         raise HTTPException(status_code=403, detail="Manager access required")
     return current_user
 
-def employee_required(current_user: User = Depends(get_current_user)):
+async def employee_required(current_user: Principal = Depends(get_principal)):
     if current_user.role != RoleEnum.employee:
         raise HTTPException(status_code=403, detail="Employee access required")
     return current_user
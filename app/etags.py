@@ -0,0 +1,66 @@
+import hashlib
+import os
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+
+# ---------------- Deploy fingerprint ----------------
+# Part of every ETag, so a release that changes templates or static files
+# doesn't get 304s for pages rendered by the old one.
+def _tree_fingerprint(*dirs) -> str:
+    h = hashlib.blake2b(digest_size=8)
+    for root_dir in dirs:
+        for root, _, files in sorted(os.walk(root_dir)):
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                h.update(f"{root}/{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return h.hexdigest()
+
+
+DEPLOY_FINGERPRINT = os.getenv("APP_VERSION") or _tree_fingerprint("templates", "static")
+
+
+# ---------------- Watermarks ----------------
+def watermark(model, *where, updated_column=None):
+    """Scalar subqueries that change whenever rows in this scope are added, removed or updated."""
+    def scoped(column):
+        stmt = select(column).select_from(model)
+        return stmt.where(*where).scalar_subquery() if where else stmt.scalar_subquery()
+
+    parts = [scoped(func.count()), scoped(func.max(model.id))]
+    if updated_column is not None:
+        parts.append(scoped(func.max(updated_column)))
+    return parts
+
+
+async def page_etag(request: Request, db, principal, *watermarks, extra=()) -> str:
+    """Weak ETag for a page: who is asking, the exact URL and one watermark query."""
+    values = (await db.execute(select(*[p for parts in watermarks for p in parts]))).one() if watermarks else ()
+    key = repr((DEPLOY_FINGERPRINT, principal.id, principal.role.value, principal.token_version,
+                str(request.url), tuple(values), tuple(extra)))
+    return f'W/"{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}"'
+
+
+# ---------------- Conditional GET ----------------
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # weak comparison, as RFC 9110 requires for If-None-Match
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+
+def cache_headers(etag: str) -> dict:
+    # private + no-cache: browsers keep the page but revalidate it on every use
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
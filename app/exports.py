@@ -0,0 +1,137 @@
+import csv
+import enum
+import io
+import json
+import os
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from app.models import Task, TaskHistory, TaskReassign, User
+from app.pagination import apply_date_range
+
+# rows fetched from the server-side cursor (and written out) at a time
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "2000"))
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+# ---------------- Queries ----------------
+# Each dataset is a plain column select (no ORM objects) ordered by id, with
+# the date column used for ?start/?end and a way to restrict it to a manager.
+def tasks_query(manager_id: int = None, start: str = None, end: str = None):
+    AssignedTo = aliased(User)
+    AssignedBy = aliased(User)
+    stmt = (
+        select(
+            Task.id, Task.title, Task.description, Task.status, Task.hours_spent,
+            Task.assigned_to_id, AssignedTo.username.label("assigned_to"),
+            Task.assigned_by_id, AssignedBy.username.label("assigned_by"),
+            Task.created_at, Task.updated_at,
+        )
+        .outerjoin(AssignedTo, AssignedTo.id == Task.assigned_to_id)
+        .outerjoin(AssignedBy, AssignedBy.id == Task.assigned_by_id)
+        .order_by(Task.id)
+    )
+    if manager_id:
+        stmt = stmt.where(Task.assigned_by_id == manager_id)
+    return apply_date_range(stmt, Task.created_at, start, end)
+
+
+def history_query(manager_id: int = None, start: str = None, end: str = None):
+    stmt = (
+        select(
+            TaskHistory.id, TaskHistory.task_id, Task.title.label("task_title"),
+            TaskHistory.updated_by_id, User.username.label("updated_by"),
+            TaskHistory.status_before, TaskHistory.status_after, TaskHistory.hours_spent,
+            TaskHistory.timestamp,
+        )
+        .outerjoin(Task, Task.id == TaskHistory.task_id)
+        .outerjoin(User, User.id == TaskHistory.updated_by_id)
+        .order_by(TaskHistory.id)
+    )
+    if manager_id:
+        stmt = stmt.where(Task.assigned_by_id == manager_id)
+    return apply_date_range(stmt, TaskHistory.timestamp, start, end)
+
+
+def reassigns_query(manager_id: int = None, start: str = None, end: str = None):
+    Previous = aliased(User)
+    New = aliased(User)
+    By = aliased(User)
+    stmt = (
+        select(
+            TaskReassign.id, TaskReassign.task_id,
+            TaskReassign.previous_assignee_id, Previous.username.label("previous_assignee"),
+            TaskReassign.new_assignee_id, New.username.label("new_assignee"),
+            TaskReassign.reassigned_by_id, By.username.label("reassigned_by"),
+            TaskReassign.reason, TaskReassign.timestamp,
+        )
+        .outerjoin(Previous, Previous.id == TaskReassign.previous_assignee_id)
+        .outerjoin(New, New.id == TaskReassign.new_assignee_id)
+        .outerjoin(By, By.id == TaskReassign.reassigned_by_id)
+        .order_by(TaskReassign.id)
+    )
+    if manager_id:
+        stmt = stmt.where(TaskReassign.reassigned_by_id == manager_id)
+    return apply_date_range(stmt, TaskReassign.timestamp, start, end)
+
+
+DATASETS = {
+    "tasks": tasks_query,
+    "task_history": history_query,
+    "task_reassigns": reassigns_query,
+}
+
+
+# ---------------- Encoding ----------------
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _encode_csv(columns, rows, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows([_plain(v) for v in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+def _encode_ndjson(columns, rows, header: bool) -> bytes:
+    return "".join(
+        json.dumps({c: _plain(v) for c, v in zip(columns, row)}) + "\n" for row in rows
+    ).encode()
+
+
+async def stream_export(db, stmt, fmt: str, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Body chunks for a StreamingResponse, read from a server-side cursor.
+
+    Only `chunk_rows` rows are held at a time, so memory stays flat however
+    big the export is. The session must stay open until the body is done
+    (the request context in main.py closes it after the response).
+    """
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    columns = list(stmt.selected_columns.keys())
+    result = await db.stream(stmt.execution_options(yield_per=chunk_rows))
+    header = True
+    async for rows in result.partitions(chunk_rows):
+        yield encode(columns, rows, header)
+        header = False
+    if header and fmt == "csv":
+        # empty export: still send the header row
+        yield encode(columns, [], True)
+
+
+def export_statement(dataset: str, fmt: str, manager_id: int = None, start: str = None, end: str = None):
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {dataset}")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    return DATASETS[dataset](manager_id, start, end)
@@ -0,0 +1,91 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+# rendered fragments kept per process (a table row is typically under 1 KB)
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "20000"))
+
+
+# ---------------- Cache ----------------
+class FragmentCache:
+    """Bounded LRU of rendered template fragments, with hit/miss counters."""
+
+    def __init__(self, maxsize: int = FRAGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._fragments = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._fragments.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._fragments.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._fragments[key] = value
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.maxsize:
+                self._fragments.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"size": len(self._fragments), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return len(self._fragments)
+
+
+fragment_cache = FragmentCache()
+
+
+# ---------------- Template tag ----------------
+class FragmentCacheExtension(Extension):
+    """{% cache key, ... %}...{% endcache %} renders its body once per key.
+
+    The key parts must cover everything the body shows -- usually the row's
+    id and updated_at, plus any joined names. Keys are also scoped to the
+    template and to this compile of it, so an edited template never serves
+    fragments rendered by the old one.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=fragment_cache)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        scope = nodes.Const(f"{parser.name}:{lineno}:{uuid.uuid4().hex[:12]}")
+        call = self.call_method("_render", [scope, nodes.Tuple(parts, "load")])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, scope, parts, caller):
+        cache = self.environment.fragment_cache
+        key = (scope, parts)
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = caller()
+            cache.set(key, fragment)
+        return fragment
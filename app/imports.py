@@ -0,0 +1,191 @@
+import csv
+import json
+import os
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from app.models import User, RoleEnum
+from app.passwords import password_pool
+from app.snapshots import dashboard_snapshot
+from app.schemas import EmployeeImportRow
+
+# rows validated, duplicate-checked, hashed and inserted together
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+
+CSV_FIELDS = ("name", "username", "email", "password")
+
+
+# ---------------- Parsing ----------------
+def _decode(line: bytes, first: bool):
+    try:
+        return line.decode("utf-8-sig" if first else "utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        return None
+
+
+async def iter_lines(chunks):
+    """Text lines from a stream of byte chunks.
+
+    Lines are split before they are decoded (a newline byte never occurs
+    inside a UTF-8 sequence), so a line that isn't valid UTF-8 comes out as
+    None and only that record is rejected.
+    """
+    buffer = b""
+    first = True
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield _decode(line, first)
+            first = False
+    if buffer:
+        yield _decode(buffer, first)
+
+
+async def iter_records(lines, fmt: str):
+    """(line number, dict or error message) for every non-blank record.
+
+    CSV needs a header row naming at least name, username, email and
+    password; each record has to fit on one line.
+    """
+    header = None
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if line is None:
+            if fmt == "csv" and header is None:
+                raise HTTPException(status_code=400, detail="CSV header is not valid UTF-8 text")
+            yield line_no, "Not valid UTF-8 text"
+            continue
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_no, "Invalid JSON"
+                continue
+            yield line_no, record if isinstance(record, dict) else "Expected a JSON object"
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [h.strip().lower() for h in values]
+            missing = [f for f in CSV_FIELDS if f not in header]
+            if missing:
+                raise HTTPException(status_code=400, detail=f"CSV header is missing: {', '.join(missing)}")
+            continue
+        if len(values) != len(header):
+            yield line_no, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield line_no, dict(zip(header, values))
+
+
+# ---------------- Import ----------------
+class EmployeeImport:
+    """Streams employee records into the users table in batches.
+
+    Per batch: validate rows, drop duplicates (within the upload and against
+    existing usernames/emails, in one query), hash the passwords across the
+    password pool and insert with one executemany. Rows that fail are
+    reported by line number; the rest are committed batch by batch.
+    """
+
+    def __init__(self, db, manager_id: int, batch_size: int = IMPORT_BATCH_SIZE):
+        self.db = db
+        self.manager_id = manager_id
+        self.batch_size = batch_size
+        self.imported = 0
+        self.errors = []
+        self._usernames = set()
+        self._emails = set()
+
+    def _error(self, line_no: int, username, message: str):
+        self.errors.append({"row": line_no, "username": username, "error": message})
+
+    def _validate(self, line_no: int, record):
+        if isinstance(record, str):
+            self._error(line_no, None, record)
+            return None
+        try:
+            row = EmployeeImportRow(**{f: record.get(f) for f in CSV_FIELDS})
+        except ValidationError as e:
+            err = e.errors()[0]
+            self._error(line_no, record.get("username"), f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}")
+            return None
+        username, email = row.username, row.email.lower()
+        if username in self._usernames or email in self._emails:
+            self._error(line_no, username, "Duplicate username or email in upload")
+            return None
+        self._usernames.add(username)
+        self._emails.add(email)
+        return row
+
+    async def _existing(self, rows):
+        usernames = [row.username for row in rows]
+        # emails compare case-insensitively on both sides
+        emails = [row.email.lower() for row in rows]
+        result = await self.db.execute(
+            select(User.username, User.email)
+            .where(or_(User.username.in_(usernames), func.lower(User.email).in_(emails)))
+        )
+        taken_usernames, taken_emails = set(), set()
+        for username, email in result:
+            taken_usernames.add(username)
+            taken_emails.add(email.lower())
+        return taken_usernames, taken_emails
+
+    async def _insert(self, values) -> bool:
+        try:
+            await self.db.execute(insert(User), values)
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            return False
+        # Core inserts skip the ORM events that keep the admin stats fresh
+        dashboard_snapshot.invalidate()
+        return True
+
+    async def _flush(self, batch):
+        if not batch:
+            return
+        taken_usernames, taken_emails = await self._existing([row for _, row in batch])
+        fresh = []
+        for line_no, row in batch:
+            if row.username in taken_usernames or row.email.lower() in taken_emails:
+                self._error(line_no, row.username, "Username or email already exists")
+            else:
+                fresh.append((line_no, row))
+        if not fresh:
+            return
+
+        hashes = await password_pool.hash_many([row.password for _, row in fresh])
+        values = [
+            {"name": row.name, "username": row.username, "email": row.email, "password_hash": password_hash,
+             "role": RoleEnum.employee, "created_by_id": self.manager_id}
+            for (_, row), password_hash in zip(fresh, hashes)
+        ]
+        if await self._insert(values):
+            self.imported += len(values)
+            return
+        # someone else took one of these names since the check: retry row by row
+        for (line_no, row), value in zip(fresh, values):
+            if await self._insert([value]):
+                self.imported += 1
+            else:
+                self._error(line_no, row.username, "Username or email already exists")
+
+    async def run(self, records):
+        batch = []
+        async for line_no, record in records:
+            row = self._validate(line_no, record)
+            if row is not None:
+                batch.append((line_no, row))
+            if len(batch) >= self.batch_size:
+                await self._flush(batch)
+                batch = []
+        await self._flush(batch)
+        errors = sorted(self.errors, key=lambda e: e["row"])
+        return {"imported": self.imported, "failed": len(errors), "errors": errors}
@@ -0,0 +1,158 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.compression import compression_metrics
+from app.fragments import fragment_cache
+from app.querystats import query_metrics
+
+# upper bounds (ms) of the wait-time histogram buckets; the last one is +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+
+
+class Histogram:
+    def __init__(self, buckets=WAIT_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "buckets": {("+Inf" if b == float("inf") else str(b)): c for b, c in zip(self.buckets, self.counts)},
+            "sum": round(self.total, 3),
+            "count": self.count,
+        }
+
+
+# ---------------- Connection pool ----------------
+class PoolMetrics:
+    """Counters fed by pool events and by the timed pool classes below."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.overflow_checkouts = 0
+        self.max_overflow_seen = 0
+        self.wait_ms = Histogram()
+
+    def attach(self, engine):
+        pool = getattr(engine, "sync_engine", engine).pool
+        self.pool = pool
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+        if isinstance(pool, _TimedPoolMixin):
+            pool.metrics = self
+
+    def _on_connect(self, dbapi_conn, record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_conn, record, proxy):
+        overflow = self.pool.overflow() if hasattr(self.pool, "overflow") else 0
+        with self._lock:
+            self.checkouts += 1
+            if overflow > 0:
+                self.overflow_checkouts += 1
+                self.max_overflow_seen = max(self.max_overflow_seen, overflow)
+
+    def _on_checkin(self, dbapi_conn, record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, dbapi_conn, record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def observe_wait(self, elapsed_ms: float, waited: bool):
+        with self._lock:
+            self.wait_ms.observe(elapsed_ms)
+            if waited:
+                self.waits += 1
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        with self._lock:
+            data = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "waits": self.waits,
+                "overflow_checkouts": self.overflow_checkouts,
+                "max_overflow_seen": self.max_overflow_seen,
+                "wait_ms": self.wait_ms.snapshot(),
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+        return data
+
+
+class _TimedPoolMixin:
+    """Times how long each checkout waits for a connection.
+
+    A checkout counts as a wait when no idle connection and no overflow slot
+    was available, i.e. the caller had to block on the pool.
+    """
+
+    metrics = None
+
+    def _do_get(self):
+        if self.metrics is None:
+            return super()._do_get()
+        saturated = self.checkedin() == 0 and 0 <= self._max_overflow <= self.overflow()
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.metrics.observe_wait((time.perf_counter() - start) * 1000, saturated)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+pool_metrics = {}
+
+
+def instrument_pool(name: str, engine):
+    metrics = PoolMetrics(name)
+    metrics.attach(engine)
+    pool_metrics[name] = metrics
+    return metrics
+
+
+def snapshot() -> dict:
+    return {
+        "pools": {name: m.snapshot() for name, m in pool_metrics.items()},
+        "fragments": fragment_cache.snapshot(),
+        "compression": compression_metrics.snapshot(),
+        "queries": query_metrics.snapshot(),
+    }
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime, Float
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime, Float, Index, func, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -14,6 +14,11 @@ class TaskStatusEnum(str, enum.Enum):
     in_progress = "in_progress"
     completed = "completed"
 
+class OutboxStatusEnum(str, enum.Enum):
+    pending = "pending"
+    sent = "sent"
+    dead = "dead"
+
 class RevokedToken(Base):
     __tablename__ = "revoked_tokens"
 
@@ -23,6 +28,11 @@ class RevokedToken(Base):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_by_id_created_at", "created_by_id", "created_at"),
+        Index("ix_users_role_created_at", "role", "created_at"),
+        Index("ix_users_role_name", "role", "name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     uuid = Column(String, default=lambda: str(uuid.uuid4()), unique=True, index=True)
@@ -33,6 +43,8 @@ class User(Base):
     role = Column(Enum(RoleEnum), nullable=False)
     created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # bumped to invalidate every token issued to this user
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationship to track who created this user
     created_by = relationship(
@@ -55,6 +67,14 @@ class User(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_assigned_by_id_created_at", "assigned_by_id", "created_at"),
+        Index("ix_tasks_assigned_to_id_status", "assigned_to_id", "status"),
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_updated_at", "updated_at"),
+        Index("ix_tasks_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_tasks_title_id", "title", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -72,8 +92,40 @@ class Task(Base):
         cascade="all, delete"
     )
 
+
+# Full-text search over title (weight A) and description (weight B). The
+# config and weights are literals, not bound parameters, so the query in
+# app.search is textually identical to this expression and Postgres can use
+# the GIN index. SQLite gets an FTS5 table instead (app.search).
+def task_search_vector(title, description):
+    config = text("'english'::regconfig")
+    return func.setweight(func.to_tsvector(config, func.coalesce(title, text("''"))), text("'A'")).op("||")(
+        func.setweight(func.to_tsvector(config, func.coalesce(description, text("''"))), text("'B'"))
+    )
+
+
+# status and hours_spent are nullable; list pages sort a NULL as the column
+# default. The defaults are literals, so the ORDER BY and cursor WHERE that
+# app.pagination.SortOrder builds from these match the indexes below (and
+# alembic 3f7b9d2e6a18).
+task_status_sort = func.coalesce(Task.__table__.c.status, text("'pending'"))
+task_hours_sort = func.coalesce(Task.__table__.c.hours_spent, text("0"))
+
+Index("ix_tasks_assigned_to_id_status_sort", Task.__table__.c.assigned_to_id, task_status_sort, Task.__table__.c.id)
+Index("ix_tasks_assigned_to_id_hours_sort", Task.__table__.c.assigned_to_id, task_hours_sort, Task.__table__.c.id)
+
+
+Index(
+    "ix_tasks_search_vector",
+    task_search_vector(Task.__table__.c.title, Task.__table__.c.description),
+    postgresql_using="gin",
+).ddl_if(dialect="postgresql")
+
 class TaskHistory(Base):
     __tablename__ = "task_history"
+    __table_args__ = (
+        Index("ix_task_history_updated_by_id", "updated_by_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(Integer, ForeignKey("tasks.id"))
@@ -88,6 +140,10 @@ class TaskHistory(Base):
 
 class TaskReassign(Base):
     __tablename__ = "task_reassigns"
+    __table_args__ = (
+        Index("ix_task_reassigns_reassigned_by_id_timestamp", "reassigned_by_id", "timestamp"),
+        Index("ix_task_reassigns_timestamp_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(Integer, ForeignKey("tasks.id"))
@@ -101,3 +157,22 @@ class TaskReassign(Base):
     previous_assignee = relationship("User", foreign_keys=[previous_assignee_id])
     new_assignee = relationship("User", foreign_keys=[new_assignee_id])
     reassigned_by = relationship("User", foreign_keys=[reassigned_by_id])
+
+
+class EmailOutbox(Base):
+    """Emails written in the same transaction as the change they announce; sent by app.outbox."""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(String, nullable=False)
+    status = Column(Enum(OutboxStatusEnum), nullable=False, default=OutboxStatusEnum.pending)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
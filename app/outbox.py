@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+import aiosmtplib
+from sqlalchemy import select
+
+from app.database import open_session
+from app.models import EmailOutbox, OutboxStatusEnum
+
+logger = logging.getLogger(__name__)
+
+# ---------------- Settings ----------------
+# the sender only runs when SMTP_HOST is set; until then mail stays queued
+SMTP_HOST = os.getenv("SMTP_HOST", "")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME") or None
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD") or None
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+MAIL_FROM = os.getenv("MAIL_FROM", "noreply@example.com")
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_RETRY_BASE = float(os.getenv("OUTBOX_RETRY_BASE", "30"))  # seconds, doubled per attempt
+OUTBOX_RETRY_MAX = float(os.getenv("OUTBOX_RETRY_MAX", "3600"))
+# how long a claimed batch is hidden from other workers while it is being sent
+OUTBOX_LEASE = float(os.getenv("OUTBOX_LEASE", "300"))
+
+
+# ---------------- Enqueue ----------------
+def queue_email(db, to: str, subject: str, body: str):
+    """Add an email to the outbox; it is sent only if the caller's transaction commits."""
+    db.add(EmailOutbox(recipient=to, subject=subject, body=body))
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(OUTBOX_RETRY_BASE * 2 ** (attempts - 1), OUTBOX_RETRY_MAX))
+
+
+# errors that say the server (not this message) is the problem
+CONNECTION_ERRORS = (aiosmtplib.SMTPConnectError, aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPTimeoutError, OSError)
+
+
+def _is_permanent(exc: Exception) -> bool:
+    # 5xx replies (unknown mailbox, rejected sender...) won't get better by retrying
+    if isinstance(exc, aiosmtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(exc, aiosmtplib.SMTPResponseException) and exc.code >= 500
+
+
+# ---------------- Sender ----------------
+class OutboxSender:
+    """Background task that drains email_outbox over one reused SMTP connection.
+
+    Each round claims up to `batch_size` due messages (FOR UPDATE SKIP LOCKED
+    plus a lease, so several app processes can run a sender), sends them
+    one after another on the open connection and records the outcome.
+    Failures are retried with exponential backoff; permanent SMTP errors and
+    messages out of attempts are marked dead and kept for inspection.
+    """
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, batch_size: int = OUTBOX_BATCH_SIZE,
+                 poll_interval: float = OUTBOX_POLL_INTERVAL, max_attempts: int = OUTBOX_MAX_ATTEMPTS):
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._smtp = None
+        self._task = None
+        self._stopping = asyncio.Event()
+
+    # --- SMTP connection ---
+    async def _connection(self):
+        if self._smtp is None or not self._smtp.is_connected:
+            smtp = aiosmtplib.SMTP(hostname=self.host, port=self.port, timeout=SMTP_TIMEOUT,
+                                   start_tls=SMTP_STARTTLS)
+            await smtp.connect()
+            if SMTP_USERNAME:
+                await smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+            self._smtp = smtp
+        return self._smtp
+
+    async def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                self._smtp.close()
+            self._smtp = None
+
+    async def _send(self, item: EmailOutbox):
+        message = EmailMessage()
+        message["From"] = MAIL_FROM
+        message["To"] = item.recipient
+        message["Subject"] = item.subject
+        message.set_content(item.body)
+        try:
+            await (await self._connection()).send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            # the server dropped an idle connection: reconnect once
+            self._smtp = None
+            await (await self._connection()).send_message(message)
+
+    # --- Outbox rows ---
+    async def _claim(self, db):
+        now = datetime.utcnow()
+        items = (await db.scalars(
+            select(EmailOutbox)
+            .where(EmailOutbox.status == OutboxStatusEnum.pending, EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )).all()
+        for item in items:
+            item.next_attempt_at = now + timedelta(seconds=OUTBOX_LEASE)
+        await db.commit()
+        return items
+
+    def _failed(self, item: EmailOutbox, exc: Exception):
+        item.attempts += 1
+        item.last_error = f"{type(exc).__name__}: {exc}"[:1000]
+        if _is_permanent(exc) or item.attempts >= self.max_attempts:
+            item.status = OutboxStatusEnum.dead
+            logger.warning("outbox: giving up on email %s to %s: %s", item.id, item.recipient, item.last_error)
+        else:
+            item.next_attempt_at = datetime.utcnow() + retry_delay(item.attempts)
+
+    async def drain_once(self) -> int:
+        """Send one batch of due emails; returns how many were claimed."""
+        db = open_session()
+        try:
+            items = await self._claim(db)
+            for n, item in enumerate(items):
+                try:
+                    await self._send(item)
+                except CONNECTION_ERRORS as exc:
+                    self._failed(item, exc)
+                    await self._disconnect()
+                    # server unreachable: put the rest of the batch back without using up an attempt
+                    for rest in items[n + 1:]:
+                        rest.next_attempt_at = item.next_attempt_at
+                    break
+                except aiosmtplib.SMTPException as exc:
+                    self._failed(item, exc)
+                else:
+                    item.status = OutboxStatusEnum.sent
+                    item.sent_at = datetime.utcnow()
+            await db.commit()
+            return len(items)
+        finally:
+            await db.close()
+
+    # --- Lifecycle ---
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                claimed = await self.drain_once()
+            except Exception:
+                logger.exception("outbox: drain failed")
+                claimed = 0
+            if claimed >= self.batch_size:
+                continue  # more is probably waiting
+            if claimed == 0:
+                # nothing more to send for now: don't hold the SMTP connection open
+                await self._disconnect()
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await self._disconnect()
+
+
+outbox_sender = OutboxSender()
@@ -0,0 +1,160 @@
+import base64
+import enum
+import json
+from datetime import date, datetime, time, timedelta
+from operator import attrgetter
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def clamp_page_size(limit) -> int:
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+# ---------------- Keyset cursors ----------------
+# A cursor is the (timestamp, id) of the last row on the previous page,
+# so the next page is "rows strictly after it" in the page's sort order.
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    raw = f"{ts.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def apply_keyset(stmt, ts_column, id_column, cursor: str = None):
+    """Order newest first on (ts, id) and skip past `cursor` if given."""
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(ts_column, id_column) < tuple_(ts, row_id))
+    return stmt.order_by(ts_column.desc(), id_column.desc())
+
+
+def split_page(rows, limit: int, key):
+    """Trim the extra look-ahead row and build the cursor for the next page.
+
+    Queries fetch limit + 1 rows; `key(row)` returns the (ts, id) of a row.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+# ---------------- Sorting ----------------
+class SortOrder:
+    """A whitelisted ?sort= value ("title", "-created") with keyset paging.
+
+    `columns` maps sort keys to columns, or to (column, attribute path) when
+    the value is read from a related object (e.g. "assigned_to.name"). The
+    id column breaks ties, so the cursor resumes exactly after the last row.
+    Sort columns should be non-null and backed by an index for the page's
+    WHERE clause. A nullable column is sorted as (coalesce(column, default),
+    attribute path, default): NULLs order and page as the default.
+    """
+
+    def __init__(self, columns: dict, id_column, sort: str = None, default: str = None):
+        sort = sort or default
+        key = sort.lstrip("-")
+        if key not in columns:
+            raise HTTPException(status_code=400, detail=f"Unknown sort: {sort}")
+        column = columns[key]
+        column, path, if_null = (column + (None,))[:3] if isinstance(column, tuple) else (column, column.key, None)
+        self.key = key
+        self.descending = sort.startswith("-")
+        self.value = f"-{key}" if self.descending else key
+        self.column = column
+        self.id_column = id_column
+        self._read = attrgetter(path)
+        self._if_null = if_null
+
+    def direction(self, key: str) -> str:
+        """CSS class for a column header: asc/desc on the active key, blank otherwise."""
+        if key != self.key:
+            return ""
+        return "desc" if self.descending else "asc"
+
+    def apply(self, stmt, cursor: str = None):
+        if cursor:
+            value, row_id = self._decode(cursor)
+            position = tuple_(self.column, self.id_column)
+            after = tuple_(value, row_id, types=(self.column.type, self.id_column.type))
+            stmt = stmt.where(position < after if self.descending else position > after)
+        if self.descending:
+            return stmt.order_by(self.column.desc(), self.id_column.desc())
+        return stmt.order_by(self.column.asc(), self.id_column.asc())
+
+    def split(self, rows, limit: int, entity=lambda row: row):
+        """Like split_page; `entity(row)` is the object the sort value is read from."""
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = entity(rows[-1])
+        value = self._read(last)
+        if value is None:
+            value = self._if_null
+        if isinstance(value, enum.Enum):
+            value = value.value
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        raw = json.dumps([self.value, value, last.id]).encode()
+        return rows, base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def _decode(self, cursor: str):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            sort, value, row_id = json.loads(raw)
+            if sort != self.value:
+                raise ValueError("cursor belongs to another sort order")
+            python_type = self.column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif issubclass(python_type, enum.Enum):
+                value = python_type(value)
+            return value, int(row_id)
+        except (ValueError, TypeError, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_links(request, next_cursor: str = None) -> dict:
+    """First/next page URLs that keep the page's other query parameters."""
+    url = request.url
+    def relative(u):
+        return f"{u.path}?{u.query}" if u.query else u.path
+    return {
+        "first_url": relative(url.remove_query_params("cursor")) if "cursor" in request.query_params else None,
+        "next_url": relative(url.include_query_params(cursor=next_cursor)) if next_cursor else None,
+    }
+
+
+# ---------------- Date range filters ----------------
+def parse_day(value: str):
+    """YYYY-MM-DD from a query string; blank means no bound."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {value}")
+
+
+def apply_date_range(stmt, column, start: str = None, end: str = None):
+    """Keep rows whose `column` falls on or between the two days."""
+    start_day, end_day = parse_day(start), parse_day(end)
+    if start_day:
+        stmt = stmt.where(column >= datetime.combine(start_day, time.min))
+    if end_day:
+        stmt = stmt.where(column < datetime.combine(end_day + timedelta(days=1), time.min))
+    return stmt
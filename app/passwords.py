@@ -0,0 +1,113 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+# bcrypt cost; hashes made with any other cost are upgraded on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# processes doing bcrypt work (0 = run it in the threadpool instead)
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+# hash/verify jobs allowed in flight before new ones are turned away with a 503
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", str(max(HASH_WORKERS, 1) * 8)))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+# ---------------- Worker functions ----------------
+# Top-level so they can be pickled into the worker processes.
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _hash_many(passwords):
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def _verify_and_update(password: str, hashed: str):
+    return pwd_context.verify_and_update(password, hashed)
+
+
+# ---------------- Pool ----------------
+class PasswordPool:
+    """Runs bcrypt in a bounded ProcessPoolExecutor, off the request threads.
+
+    A burst of logins can only occupy `workers` cores, and at most
+    `queue_limit` jobs wait for them; past that callers get a 503 instead of
+    piling up behind each other.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, queue_limit: int = HASH_QUEUE_LIMIT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._slots = threading.BoundedSemaphore(queue_limit)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs threads isn't safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def _submit(self, fn, *args):
+        if self.workers <= 0:
+            return await run_in_threadpool(fn, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    async def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=503,
+                detail="Too many password operations in progress, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            return await self._submit(fn, *args)
+        finally:
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def hash_many(self, passwords, chunk_size: int = 8):
+        """Hash a batch across all workers.
+
+        Work goes out one chunk per worker at a time rather than all at once,
+        so logins queued meanwhile wait for at most one chunk instead of the
+        whole batch. Bulk jobs don't take queue slots.
+        """
+        chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+        wave = max(self.workers, 1)
+        hashes = []
+        for i in range(0, len(chunks), wave):
+            for done in await asyncio.gather(*(self._submit(_hash_many, chunk) for chunk in chunks[i:i + wave])):
+                hashes.extend(done)
+        return hashes
+
+    async def verify_and_update(self, password: str, hashed: str):
+        """(valid, new_hash); new_hash is set when the stored hash should be replaced."""
+        return await self._run(_verify_and_update, password, hashed)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_pool = PasswordPool()
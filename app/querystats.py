@@ -0,0 +1,185 @@
+"""Per-request SQL counts and timings, Server-Timing, and N+1 detection.
+
+Engine events count every statement the request issues and time it;
+templates add their render time. The totals go out as a Server-Timing
+header (shown in the browser dev tools' Timing tab):
+
+    Server-Timing: db;dur=4.21;count=7;desc="7 queries", render;dur=1.90
+
+A SELECT of the same shape (parameters aside) run N_PLUS_ONE_THRESHOLD times
+in one request is almost always a query per row: it is logged, or raised as
+RepeatedQueryError with N_PLUS_ONE=raise (for tests and development).
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1").lower() in ("1", "true", "yes")
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+# log (production), raise (tests, development) or off
+N_PLUS_ONE = os.getenv("N_PLUS_ONE", "log").lower()
+
+
+class RepeatedQueryError(RuntimeError):
+    pass
+
+
+# ---------------- Statement shapes ----------------
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|\$\d+|(?<![:\w]):\w+|%s")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")  # IN (?, ?, ?) of any length
+_SPACE = re.compile(r"\s+")
+_READS = re.compile(r"(SELECT|WITH)\b", re.IGNORECASE)
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with parameters, literals and IN-list lengths blanked out."""
+    shape = _PLACEHOLDERS.sub("?", statement)
+    shape = _LITERALS.sub("?", shape)
+    shape = _LISTS.sub("(?)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+# ---------------- Per-request stats ----------------
+class QueryStats:
+    """Statements and time spent in the database and in templates for one request."""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self._lock = threading.Lock()
+        self.count = 0
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+        self.shapes = Counter()
+
+    def record_query(self, statement: str, elapsed: float):
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.db_seconds += elapsed
+            if not _READS.match(shape):
+                return  # a flush may repeat an INSERT/UPDATE per object; only reads are N+1s
+            self.shapes[shape] += 1
+            repeats = self.shapes[shape]
+        if repeats == N_PLUS_ONE_THRESHOLD:
+            self._repeated(shape)
+
+    def record_render(self, elapsed: float):
+        with self._lock:
+            self.render_seconds += elapsed
+
+    def _repeated(self, shape: str):
+        query_metrics.repeated()
+        if N_PLUS_ONE == "raise":
+            raise RepeatedQueryError(f"{self.label}: same query {N_PLUS_ONE_THRESHOLD} times (N+1?): {shape}")
+        if N_PLUS_ONE == "log":
+            logger.warning("%s: same query %d times (N+1?): %s", self.label, N_PLUS_ONE_THRESHOLD, shape)
+
+    def server_timing(self) -> str:
+        queries = "1 query" if self.count == 1 else f"{self.count} queries"
+        return (f'db;dur={self.db_seconds * 1000:.2f};count={self.count};desc="{queries}", '
+                f"render;dur={self.render_seconds * 1000:.2f}")
+
+
+# set per request by QueryStatsMiddleware; None outside a request (startup,
+# background sends), which is then not counted
+current_stats: ContextVar = ContextVar("query_stats", default=None)
+
+
+def record_render(elapsed: float):
+    stats = current_stats.get()
+    if stats is not None:
+        stats.record_render(elapsed)
+
+
+# ---------------- Process totals ----------------
+class QueryMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.repeated_queries = 0
+
+    def observe(self, stats: QueryStats):
+        with self._lock:
+            self.requests += 1
+            self.statements += stats.count
+            self.db_seconds += stats.db_seconds
+
+    def repeated(self):
+        with self._lock:
+            self.repeated_queries += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "statements": self.statements,
+                "statements_per_request": round(self.statements / self.requests, 2) if self.requests else None,
+                "db_ms": round(self.db_seconds * 1000, 3),
+                "repeated_queries": self.repeated_queries,
+            }
+
+
+query_metrics = QueryMetrics()
+
+
+# ---------------- Engine hooks ----------------
+# the start time lives on the execution context, so a statement that fails
+# (and never reaches after_cursor_execute) leaves nothing behind
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and current_stats.get() is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats.get()
+    started = getattr(context, "_query_started", None)
+    if stats is not None and started is not None:
+        stats.record_query(statement, time.perf_counter() - started)
+
+
+def instrument_queries(engine):
+    engine = getattr(engine, "sync_engine", engine)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---------------- Middleware ----------------
+class QueryStatsMiddleware:
+    """Opens the QueryStats for each HTTP request and sends its Server-Timing.
+
+    The header goes out with the response start, so it covers everything up
+    to then: all of a rendered page, but only the first batch of a stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats(f"{scope['method']} {scope['path']}")
+        token = current_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and SERVER_TIMING:
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_stats.reset(token)
+            query_metrics.observe(stats)
@@ -0,0 +1,170 @@
+import hashlib
+import heapq
+import os
+import threading
+import time
+
+from jose import jwt, JWTError
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app.models import RevokedToken, User
+
+# seconds another worker may keep trusting a user's old token version
+TOKEN_VERSION_TTL = float(os.getenv("TOKEN_VERSION_TTL", "5"))
+
+
+# ---------------- Bloom filter ----------------
+class BloomFilter:
+    """Fixed-size bit array with k hash probes derived from one blake2b digest."""
+
+    def __init__(self, size_bits: int = 1 << 20, hashes: int = 7):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.bits = bytearray(size_bits // 8 + 1)
+
+    def _probes(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size_bits
+
+    def add(self, value: str):
+        for pos in self._probes(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._probes(value))
+
+
+# ---------------- Revocation cache ----------------
+def _token_exp(token: str) -> float:
+    # exp is only used to decide when the entry can be forgotten, so the
+    # signature does not need to be checked here
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        exp = None
+    return float(exp) if exp is not None else float("inf")
+
+
+class RevocationCache:
+    """Process-local view of revoked_tokens.
+
+    Lookups that miss the bloom filter are answered without touching the DB.
+    A filter hit is confirmed against the exact set, and only falls through
+    to the DB when the exact set doesn't know the token (false positive).
+    Entries are dropped once the token's exp has passed; the filter is
+    rebuilt when enough of them have gone to keep the false-positive rate low.
+    """
+
+    def __init__(self, size_bits: int = 1 << 20, hashes: int = 7):
+        self._size_bits = size_bits
+        self._hashes = hashes
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(size_bits, hashes)
+        self._tokens = {}
+        self._expiry = []
+        self._evicted = 0
+
+    def _add_locked(self, token: str, exp: float):
+        if token in self._tokens:
+            return
+        self._tokens[token] = exp
+        self._bloom.add(token)
+        if exp != float("inf"):
+            heapq.heappush(self._expiry, (exp, token))
+
+    def _evict_locked(self, now: float):
+        while self._expiry and self._expiry[0][0] <= now:
+            _, token = heapq.heappop(self._expiry)
+            if self._tokens.pop(token, None) is not None:
+                self._evicted += 1
+        if self._evicted and self._evicted >= len(self._tokens):
+            self._bloom = BloomFilter(self._size_bits, self._hashes)
+            for token in self._tokens:
+                self._bloom.add(token)
+            self._evicted = 0
+
+    def add(self, token: str):
+        with self._lock:
+            self._evict_locked(time.time())
+            self._add_locked(token, _token_exp(token))
+
+    def load(self, db):
+        """Preload every revoked token that hasn't expired yet."""
+        now = time.time()
+        with self._lock:
+            for (token,) in db.query(RevokedToken.token).yield_per(1000):
+                exp = _token_exp(token)
+                if exp > now:
+                    self._add_locked(token, exp)
+
+    async def is_revoked(self, token: str, db) -> bool:
+        with self._lock:
+            self._evict_locked(time.time())
+            if token not in self._bloom:
+                return False
+            if token in self._tokens:
+                return True
+        # filter hit the exact set can't confirm: ask the DB
+        revoked = await db.scalar(select(RevokedToken.id).where(RevokedToken.token == token)) is not None
+        if revoked:
+            with self._lock:
+                self._add_locked(token, _token_exp(token))
+        return revoked
+
+    def __len__(self):
+        return len(self._tokens)
+
+
+revoked_tokens = RevocationCache()
+
+
+# ---------------- Per-user token versions ----------------
+class TokenVersionCache:
+    """Process-local copy of users.token_version, used to reject old tokens.
+
+    Tokens carry the version they were issued with; bumping the column
+    revokes all of a user's sessions. Changes made through this process's
+    ORM drop the entry straight away, and entries are re-read after `ttl`
+    seconds so bumps from other workers are picked up too. A deleted user
+    reads as None.
+    """
+
+    def __init__(self, ttl: float = TOKEN_VERSION_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versions = {}
+        event.listen(User, "after_update", self._on_change)
+        event.listen(User, "after_delete", self._on_change)
+        event.listen(Session, "after_commit", self._on_commit)
+
+    async def get(self, user_id: int, db):
+        now = time.monotonic()
+        entry = self._versions.get(user_id)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        version = await db.scalar(select(User.token_version).where(User.id == user_id))
+        with self._lock:
+            self._versions[user_id] = (version, now + self.ttl)
+        return version
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._versions.pop(user_id, None)
+
+    def _on_change(self, mapper, connection, target):
+        self.invalidate(target.id)
+        # and again once committed, in case a reader re-cached the old row meanwhile
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault("token_version_changed", set()).add(target.id)
+
+    def _on_commit(self, session):
+        for user_id in session.info.pop("token_version_changed", ()):
+            self.invalidate(user_id)
+
+
+token_versions = TokenVersionCache()
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Form
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
-from app.schemas import UserCreate, UserResponse
-from app.models import User, RoleEnum
-from app.auth import hash_password
-from app.dependencies import get_db, admin_required
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import text
-from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas import UserCreate, UserResponse, TaskSearchPage
+from app.models import User, RoleEnum, Task, TaskStatusEnum
+from app.auth import hash_password_async
+from app.templating import templates
+from app.dependencies import get_db, admin_required, Principal
+from sqlalchemy import func, select, true
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from sqlalchemy.orm import aliased, joinedload
+from app.snapshots import dashboard_snapshot
+from app.pagination import DEFAULT_PAGE_SIZE, SortOrder, apply_date_range, apply_keyset, clamp_page_size, page_links, split_page
+from app.exports import FORMATS, export_statement, stream_export
+from app.search import search_tasks
+from app.etags import cache_headers, is_not_modified, not_modified, page_etag, watermark
+from datetime import date
+from typing import List
 
 
 
@@ -22,7 +30,6 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 
 
 # Use relative path from main.py
-templates = Jinja2Templates(directory="templates")
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
@@ -41,29 +48,54 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 
 # ---------------- Admin Dashboard (HTML) ----------------
 
+
+async def load_dashboard_stats(db: AsyncSession) -> dict:
+    # one statement: role/task totals, cross-joined with the five newest
+    # managers and their team sizes (NULL columns when there are none)
+    Member = aliased(User)
+    totals = select(
+        func.count().filter(User.role == RoleEnum.manager).label("total_managers"),
+        func.count().filter(User.role == RoleEnum.employee).label("total_employees"),
+        select(func.count()).select_from(Task).scalar_subquery().label("total_tasks"),
+    ).select_from(User).subquery()
+    recent = (
+        select(User.id, User.name, User.email, User.created_at, func.count(Member.id).label("team_size"))
+        .outerjoin(Member, Member.created_by_id == User.id)
+        .where(User.role == RoleEnum.manager)
+        .group_by(User.id, User.name, User.email, User.created_at)
+        .order_by(User.created_at.desc())
+        .limit(5)
+        .subquery()
+    )
+    stmt = select(totals, recent).select_from(totals).outerjoin(recent, true()).order_by(recent.c.created_at.desc())
+    rows = (await db.execute(stmt)).mappings().all()
+
+    first = rows[0]
+    return {
+        "total_managers": first["total_managers"],
+        "total_employees": first["total_employees"],
+        "total_tasks": first["total_tasks"],
+        "recent_managers": [
+            {"id": r["id"], "name": r["name"], "email": r["email"],
+             "created_at": r["created_at"], "team_size": int(r["team_size"] or 0)}
+            for r in rows if r["id"] is not None
+        ],
+    }
+
+
 @router.get("/dashboard", response_class=HTMLResponse)
-def admin_dashboard(request: Request, db: Session = Depends(get_db), current_user: User = Depends(admin_required)):
-    total_managers = db.query(User).filter(User.role == RoleEnum.manager).count()
-    total_employees = db.query(User).filter(User.role == RoleEnum.employee).count()
-    total_tasks = db.execute(text("SELECT COUNT(*) FROM tasks")).scalar()  # raw SQL example
-    recent_managers = db.query(User).filter(User.role == RoleEnum.manager).order_by(User.created_at.desc()).limit(5).all()
-    # compute team sizes using ORM (users reference their creator via created_by_id)
-    for m in recent_managers:
-        try:
-            cnt = db.query(User).filter(User.created_by_id == m.id).count()
-        except Exception:
-            cnt = 0
-        setattr(m, "team_size", int(cnt or 0))
-    # Simple empty activity placeholder until activity tracking exists
+async def admin_dashboard(request: Request, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(admin_required)):
+    stats = dashboard_snapshot.get()
+    if stats is None:
+        version = dashboard_snapshot.version
+        stats = await load_dashboard_stats(db)
+        dashboard_snapshot.set(stats, version)
 
     return templates.TemplateResponse(
         "admin/dashboard.html",
         {
             "request": request,
-            "total_managers": total_managers,
-            "total_employees": total_employees,
-            "total_tasks": total_tasks,
-            "recent_managers": recent_managers,
+            **stats,
             "user": current_user
         }
     )
@@ -85,61 +117,66 @@ def admin_dashboard(request: Request, db: Session = Depends(get_db), current_use
     
 
 # ---------------- List Managers (HTML) ----------------
+MANAGER_SORTS = {"name": User.name, "email": User.email, "created": User.created_at}
+
+
 @router.get("/managers/html", response_class=HTMLResponse)
-def list_managers_html(request: Request, db: Session = Depends(get_db), current_user: User = Depends(admin_required)):
-    managers = db.query(User).filter(User.role == RoleEnum.manager).all()
+async def list_managers_html(request: Request, q: str = None, sort: str = None, cursor: str = None,
+                             limit: int = DEFAULT_PAGE_SIZE,
+                             db: AsyncSession = Depends(get_db), current_user: Principal = Depends(admin_required)):
+    limit = clamp_page_size(limit)
+    sort = SortOrder(MANAGER_SORTS, User.id, sort, default="name")
+    # team size per manager, answered from ix_users_created_by_id_created_at
+    Member = aliased(User)
+    team_size = (
+        select(func.count()).select_from(Member).where(Member.created_by_id == User.id)
+        .correlate(User).scalar_subquery()
+    )
+    stmt = select(User, team_size).where(User.role == RoleEnum.manager)
+    if q:
+        stmt = stmt.where(User.name.icontains(q, autoescape=True) | User.email.icontains(q, autoescape=True))
+    stmt = sort.apply(stmt, cursor).limit(limit + 1)
+    rows, next_cursor = sort.split((await db.execute(stmt)).all(), limit, lambda row: row[0])
 
-    for m in managers:
-        try:
-            cnt = db.query(User).filter(User.created_by_id == m.id).count()
-        except Exception:
-            cnt = 0
-        setattr(m, "team_size", int(cnt or 0))
+    managers = []
+    for m, size in rows:
+        setattr(m, "team_size", int(size or 0))
+        managers.append(m)
 
     return templates.TemplateResponse(
         "admin/managers.html",
-        {"request": request, "managers": managers, "user": current_user}
+        {"request": request, "managers": managers, "user": current_user, "sort": sort, "q": q or "",
+         **page_links(request, next_cursor)}
     )
 
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
 # ---------------- View Manager Details (HTML) ----------------
 @router.get("/manager/{manager_id}/html", response_class=HTMLResponse)
-def view_manager_html(manager_id: int, request: Request, db: Session = Depends(get_db), current_user: User = Depends(admin_required)):
+async def view_manager_html(manager_id: int, request: Request, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(admin_required)):
     from app.models import Task, User
 
     # 1. Fetch manager
-    manager = db.query(User).filter(User.id == manager_id, User.role == RoleEnum.manager).first()
+    manager = await db.scalar(select(User).where(User.id == manager_id, User.role == RoleEnum.manager))
     if not manager:
         raise HTTPException(status_code=404, detail="Manager not found")
 
     # 2. Fetch employees created by this manager
-    employees = db.query(User).filter(User.created_by_id == manager.id).order_by(User.created_at.desc()).all()
+    employees = (await db.scalars(select(User).where(User.created_by_id == manager.id).order_by(User.created_at.desc()))).all()
 
-    # 3. Fetch tasks assigned by this manager
-    tasks = db.query(Task).filter(Task.assigned_by_id == manager.id).order_by(Task.created_at.desc()).all()
+    # 3. Fetch tasks assigned by this manager, with the assignee's name from a join
+    Employee = aliased(User)
+    rows = (await db.execute(
+        select(Task, Employee.name)
+        .outerjoin(Employee, Employee.id == Task.assigned_to_id)
+        .where(Task.assigned_by_id == manager.id)
+        .order_by(Task.created_at.desc())
+    )).all()
 
     # Add assigned_to_name so template can show employee names easily
-    for t in tasks:
-        employee = db.query(User).filter(User.id == t.assigned_to_id).first()
-        t.assigned_to_name = employee.name if employee else "Unassigned"
+    tasks = []
+    for t, employee_name in rows:
+        t.assigned_to_name = employee_name or "Unassigned"
+        tasks.append(t)
 
     return templates.TemplateResponse(
         "admin/manager_detail.html",
@@ -175,25 +212,56 @@ def view_manager_html(manager_id: int, request: Request, db: Session = Depends(g
     
     
     
+TASK_SORTS = {"created": Task.created_at, "updated": Task.updated_at, "title": Task.title}
+
+
 @router.get("/tasks/html", response_class=HTMLResponse)
-def view_all_tasks_html(request: Request, db: Session = Depends(get_db), current_user: User = Depends(admin_required)):
-    from app.models import Task, User
-    tasks = db.query(Task).order_by(Task.created_at.desc()).all()
-
-    for t in tasks:
-        try:
-            manager = db.query(User).filter(User.id == t.assigned_by_id).first()
-            employee = db.query(User).filter(User.id == t.assigned_to_id).first()
-        except Exception:
-            manager = None
-            employee = None
-        setattr(t, "manager_name", manager.name if manager else "Unknown")
-        setattr(t, "assigned_to_name", employee.name if employee else "Unassigned")
+async def view_all_tasks_html(request: Request, status: List[TaskStatusEnum] = Query(None), sort: str = None,
+                              cursor: str = None, limit: int = DEFAULT_PAGE_SIZE,
+                              db: AsyncSession = Depends(get_db), current_user: Principal = Depends(admin_required)):
+    limit = clamp_page_size(limit)
+    sort = SortOrder(TASK_SORTS, Task.id, sort, default="-created")
+    etag = await page_etag(request, db, current_user,
+                           watermark(Task, updated_column=Task.updated_at), watermark(User))
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    Manager = aliased(User)
+    Employee = aliased(User)
+    # one query per page: manager and assignee names come from the joins
+    stmt = (
+        select(Task, Manager.name, Employee.name)
+        .outerjoin(Manager, Manager.id == Task.assigned_by_id)
+        .outerjoin(Employee, Employee.id == Task.assigned_to_id)
+    )
+    if status:
+        stmt = stmt.where(Task.status.in_(status))
+    stmt = sort.apply(stmt, cursor).limit(limit + 1)
+    rows, next_cursor = sort.split((await db.execute(stmt)).all(), limit, lambda row: row[0])
+
+    tasks = []
+    for t, manager_name, employee_name in rows:
+        setattr(t, "manager_name", manager_name or "Unknown")
+        setattr(t, "assigned_to_name", employee_name or "Unassigned")
+        tasks.append(t)
 
     return templates.TemplateResponse(
         "admin/all_tasks.html",
-        {"request": request, "tasks": tasks, "user": current_user}
+        {"request": request, "tasks": tasks, "user": current_user, "sort": sort,
+         "status": [s.value for s in status or ()], "statuses": list(TaskStatusEnum),
+         **page_links(request, next_cursor)},
+        headers=cache_headers(etag),
     )
+
+
+# ---------------- Task Search (JSON) ----------------
+@router.get("/tasks/search", response_model=TaskSearchPage)
+async def search_all_tasks(q: str = Query(..., min_length=1, max_length=200), status: List[TaskStatusEnum] = Query(None),
+                           assignee_id: int = None, page: int = Query(1, ge=1), limit: int = DEFAULT_PAGE_SIZE,
+                           db: AsyncSession = Depends(get_db), current_user: Principal = Depends(admin_required)):
+    """Full-text search over every task's title and description, best match first."""
+    limit = clamp_page_size(limit)
+    items, next_page = await search_tasks(db, q, status=status, assignee_id=assignee_id, page=page, limit=limit)
+    return {"items": items, "page": page, "next_page": next_page}
     
     
     
@@ -214,20 +282,27 @@ def view_all_tasks_html(request: Request, db: Session = Depends(get_db), current
     
     # ---------------- View Manager Details (HTML) ----------------
 @router.get("/manager/{manager_id}/html", response_class=HTMLResponse)
-def view_manager_html(manager_id: int, request: Request, db: Session = Depends(get_db), current_user: User = Depends(admin_required)):
+async def view_manager_html(manager_id: int, request: Request, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(admin_required)):
     from app.models import Task, User
-    manager = db.query(User).filter(User.id == manager_id, User.role == RoleEnum.manager).first()
+    manager = await db.scalar(select(User).where(User.id == manager_id, User.role == RoleEnum.manager))
     if not manager:
         raise HTTPException(status_code=404, detail="Manager not found")
 
     # Load employees
-    employees = db.query(User).filter(User.created_by_id == manager.id).order_by(User.created_at.desc()).all()
-
-    # Load tasks assigned by this manager
-    tasks = db.query(Task).filter(Task.assigned_by_id == manager.id).order_by(Task.created_at.desc()).all()
-    for t in tasks:
-        employee = db.query(User).filter(User.id == t.assigned_to_id).first()
-        setattr(t, "assigned_to_name", employee.name if employee else "Unassigned")
+    employees = (await db.scalars(select(User).where(User.created_by_id == manager.id).order_by(User.created_at.desc()))).all()
+
+    # Load tasks assigned by this manager, with the assignee's name from a join
+    Employee = aliased(User)
+    rows = (await db.execute(
+        select(Task, Employee.name)
+        .outerjoin(Employee, Employee.id == Task.assigned_to_id)
+        .where(Task.assigned_by_id == manager.id)
+        .order_by(Task.created_at.desc())
+    )).all()
+    tasks = []
+    for t, employee_name in rows:
+        setattr(t, "assigned_to_name", employee_name or "Unassigned")
+        tasks.append(t)
 
     activity = []
 
@@ -267,32 +342,46 @@ def view_manager_html(manager_id: int, request: Request, db: Session = Depends(g
 
 # ---------------- Task Reassign History (HTML) ----------------
 @router.get("/reassign_history/html", response_class=HTMLResponse)
-def reassign_history_html(request: Request, db: Session = Depends(get_db), current_user: User = Depends(admin_required)):
-    # list recent reassign events with related user and task info
-    try:
-        from app.models import TaskReassign, Task, User
-        reassigns = db.query(TaskReassign).order_by(TaskReassign.timestamp.desc()).limit(200).all()
-    except Exception:
-        reassigns = []
-
-    # eager load relevant display fields manually to keep template simple
-    display = []
-    for r in reassigns:
-        task = db.query(Task).filter(Task.id == r.task_id).first()
-        prev = db.query(User).filter(User.id == r.previous_assignee_id).first()
-        new = db.query(User).filter(User.id == r.new_assignee_id).first()
-        by = db.query(User).filter(User.id == r.reassigned_by_id).first()
-        display.append({
-            "reassign": r,
-            "task": task,
-            "previous": prev,
-            "new": new,
-            "by": by
-        })
+async def reassign_history_html(request: Request, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE,
+                                start: str = None, end: str = None,
+                                db: AsyncSession = Depends(get_db), current_user: Principal = Depends(admin_required)):
+    # list reassign events with related user and task info, one page per query
+    from app.models import TaskReassign
+    limit = clamp_page_size(limit)
+    stmt = select(TaskReassign).options(
+        joinedload(TaskReassign.task),
+        joinedload(TaskReassign.previous_assignee),
+        joinedload(TaskReassign.new_assignee),
+        joinedload(TaskReassign.reassigned_by),
+    )
+    stmt = apply_date_range(stmt, TaskReassign.timestamp, start, end)
+    stmt = apply_keyset(stmt, TaskReassign.timestamp, TaskReassign.id, cursor).limit(limit + 1)
+    reassigns, next_cursor = split_page((await db.scalars(stmt)).all(), limit, lambda r: (r.timestamp, r.id))
+
+    display = [
+        {"reassign": r, "task": r.task, "previous": r.previous_assignee, "new": r.new_assignee, "by": r.reassigned_by}
+        for r in reassigns
+    ]
 
     return templates.TemplateResponse(
         "admin/reassign_history.html",
-        {"request": request, "items": display, "user": current_user}
+        {"request": request, "items": display, "user": current_user,
+         "next_cursor": next_cursor, "limit": limit, "is_first_page": not cursor,
+         "start": start or "", "end": end or ""}
+    )
+
+
+# ---------------- Exports (CSV / NDJSON) ----------------
+@router.get("/export/{dataset}")
+async def export_dataset(dataset: str, format: str = "csv", manager_id: int = None, start: str = None, end: str = None,
+                         db: AsyncSession = Depends(get_db), current_user: Principal = Depends(admin_required)):
+    """Stream tasks, task_history or task_reassigns, optionally for one manager and/or a date range."""
+    stmt = export_statement(dataset, format, manager_id, start, end)
+    filename = f"{dataset}-{date.today().isoformat()}.{format}"
+    return StreamingResponse(
+        stream_export(db, stmt, format),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
@@ -323,17 +412,17 @@ def reassign_history_html(request: Request, db: Session = Depends(get_db), curre
 
 # ---------------- Create Manager (HTML Form) ----------------
 @router.get("/create_manager/html", response_class=HTMLResponse)
-def create_manager_form(request: Request, current_user: User = Depends(admin_required)):
+async def create_manager_form(request: Request, current_user: Principal = Depends(admin_required)):
     return templates.TemplateResponse(
         "admin/create_manager.html",
         {"request": request, "user": current_user}
     )
 
 @router.post("/create_manager/html")
-def create_manager_html(request: Request, name: str = Form(...), username: str = Form(...),
+async def create_manager_html(request: Request, name: str = Form(...), username: str = Form(...),
                         email: str = Form(...), password: str = Form(...),
-                        db: Session = Depends(get_db), current_user: User = Depends(admin_required)):
-    existing = db.query(User).filter((User.username == username) | (User.email == email)).first()
+                        db: AsyncSession = Depends(get_db), current_user: Principal = Depends(admin_required)):
+    existing = await db.scalar(select(User).where((User.username == username) | (User.email == email)))
     if existing:
         return templates.TemplateResponse(
             "admin/create_manager.html",
@@ -345,16 +434,16 @@ def create_manager_html(request: Request, name: str = Form(...), username: str =
         name=name,
         username=username,
         email=email,
-        password_hash=hash_password(password),
+        password_hash=await hash_password_async(password),
         role=RoleEnum.manager,
         created_by_id=current_user.id
     )
     try:
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         return templates.TemplateResponse(
             "admin/create_manager.html",
             {"request": request, "error": "Username or email already exists", "user": current_user,
@@ -383,10 +472,10 @@ def create_manager_html(request: Request, name: str = Form(...), username: str =
 # ---------------- Delete Manager ----------------
 
 @router.get("/manager/{manager_id}/delete")
-def delete_manager(manager_id: int, db: Session = Depends(get_db), current_user: User = Depends(admin_required)):
-    manager = db.query(User).filter(User.id == manager_id, User.role == RoleEnum.manager).first()
+async def delete_manager(manager_id: int, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(admin_required)):
+    manager = await db.scalar(select(User).where(User.id == manager_id, User.role == RoleEnum.manager))
     if not manager:
         raise HTTPException(status_code=404, detail="Manager not found")
-    db.delete(manager)
-    db.commit()
+    await db.delete(manager)
+    await db.commit()
     return RedirectResponse(url="/admin/managers/html", status_code=303)
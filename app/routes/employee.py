@@ -1,31 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Form
+from sqlalchemy import select
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 
-from app.dependencies import get_db, employee_required
-from app.models import Task, TaskHistory, TaskStatusEnum, User
+from app.templating import templates
+from app.dependencies import get_db, employee_required, Principal
+from app.models import Task, TaskHistory, TaskStatusEnum, User, task_hours_sort, task_status_sort
 from app.schemas import TaskResponse, TaskUpdate
+from app.pagination import DEFAULT_PAGE_SIZE, SortOrder, clamp_page_size, page_links
+from app.etags import cache_headers, is_not_modified, not_modified, page_etag, watermark
 
 router = APIRouter(prefix="/employee", tags=["Employee"])
-templates = Jinja2Templates(directory="templates")  # Use top-level templates directory
 
 # -------------------- API Routes --------------------
 
 
 # -------------------- HTML Routes --------------------
 
+MY_TASK_SORTS = {
+    "created": Task.created_at, "title": Task.title,
+    "status": (task_status_sort, "status", TaskStatusEnum.pending), "hours": (task_hours_sort, "hours_spent", 0.0),
+}
+
 @router.get("/dashboard", response_class=HTMLResponse)
-def tasks_html(request: Request, db: Session = Depends(get_db), current_user: User = Depends(employee_required)):
-    tasks = db.query(Task).filter(Task.assigned_to_id == current_user.id).all()
+async def tasks_html(request: Request, status: List[TaskStatusEnum] = Query(None), sort: str = None,
+                     cursor: str = None, limit: int = DEFAULT_PAGE_SIZE,
+                     db: AsyncSession = Depends(get_db), current_user: Principal = Depends(employee_required)):
+    limit = clamp_page_size(limit)
+    sort = SortOrder(MY_TASK_SORTS, Task.id, sort, default="-created")
+    etag = await page_etag(request, db, current_user,
+                           watermark(Task, Task.assigned_to_id == current_user.id, updated_column=Task.updated_at))
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    # status filter answered from ix_tasks_assigned_to_id_status
+    stmt = select(Task).where(Task.assigned_to_id == current_user.id)
+    if status:
+        stmt = stmt.where(Task.status.in_(status))
+    stmt = sort.apply(stmt, cursor).limit(limit + 1)
+    tasks, next_cursor = sort.split((await db.scalars(stmt)).all(), limit)
     return templates.TemplateResponse(
         "employee/tasks.html",
-        {"request": request, "tasks": tasks, "user": current_user}
+        {"request": request, "tasks": tasks, "user": current_user, "sort": sort,
+         "status": [s.value for s in status or ()], "statuses": list(TaskStatusEnum),
+         **page_links(request, next_cursor)},
+        headers=cache_headers(etag),
     )
 
 @router.get("/update_task/html/{task_id}", response_class=HTMLResponse)
-def update_task_form(task_id: int, request: Request, db: Session = Depends(get_db), current_user: User = Depends(employee_required)):
-    task = db.query(Task).filter(Task.id == task_id, Task.assigned_to_id == current_user.id).first()
+async def update_task_form(task_id: int, request: Request, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(employee_required)):
+    task = await db.scalar(select(Task).where(Task.id == task_id, Task.assigned_to_id == current_user.id))
     if not task:
         return RedirectResponse(url="/employee/tasks/html")
     return templates.TemplateResponse(
@@ -39,15 +64,15 @@ def update_task_form(task_id: int, request: Request, db: Session = Depends(get_d
     
 
 @router.post("/update_task/html/{task_id}")
-def update_task_html(
+async def update_task_html(
     task_id: int,
     request: Request,
     status: TaskStatusEnum = Form(...),
     hours_spent: float = Form(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(employee_required)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(employee_required)
 ):
-    task = db.query(Task).filter(Task.id == task_id, Task.assigned_to_id == current_user.id).first()
+    task = await db.scalar(select(Task).where(Task.id == task_id, Task.assigned_to_id == current_user.id))
     if not task:
         return RedirectResponse(url="/employee/dashboard")
 
@@ -72,12 +97,12 @@ def update_task_html(
     )
 
     db.add(history)
-    db.commit()
+    await db.commit()
     return RedirectResponse(url="/employee/dashboard", status_code=303)
 
 @router.get("/task_history/html", response_class=HTMLResponse)
-def task_history_html(request: Request, db: Session = Depends(get_db), current_user: User = Depends(employee_required)):
-    histories = db.query(TaskHistory).filter(TaskHistory.updated_by_id == current_user.id).all()
+async def task_history_html(request: Request, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(employee_required)):
+    histories = (await db.scalars(select(TaskHistory).options(joinedload(TaskHistory.updated_by)).where(TaskHistory.updated_by_id == current_user.id))).all()
     return templates.TemplateResponse(
         "employee/task_history.html",
         {"request": request, "histories": histories, "user": current_user}
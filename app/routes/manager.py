@@ -1,49 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Form
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
-from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Form
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
+from sqlalchemy import exists, func, insert, select
+from typing import List
+from datetime import date, datetime, time, timedelta
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 
-from app.dependencies import get_db, manager_required
-from app.models import User, RoleEnum, Task, TaskStatusEnum
-from app.schemas import UserCreate, UserResponse, TaskCreate, TaskResponse
-from app.auth import hash_password
-
-try:
-    from app.utils import send_email
-except Exception:
-    def send_email(to: str, subject: str, body: str):
-        return None
+from app.templating import templates
+from app.dependencies import get_db, manager_required, Principal
+from app.models import User, RoleEnum, Task, TaskStatusEnum, task_status_sort
+from app.schemas import UserCreate, UserResponse, TaskCreate, TaskResponse, EmployeePage, EmployeeWithTasks, TaskSearchPage
+from app.pagination import DEFAULT_PAGE_SIZE, SortOrder, apply_date_range, apply_keyset, clamp_page_size, page_links, split_page
+from app.auth import hash_password_async
+from app.imports import EmployeeImport, iter_lines, iter_records
+from app.outbox import queue_email
+from app.search import search_tasks
+from app.etags import cache_headers, is_not_modified, not_modified, page_etag, watermark
+from app.snapshots import dashboard_snapshot
 
 router = APIRouter(prefix="/manager", tags=["Manager"])
-templates = Jinja2Templates(directory="templates")  # Use top-level templates directory
 
 # -------------------- API Routes --------------------
 
 @router.post("/create_employee", response_model=UserResponse)
-def create_employee(user: UserCreate, db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
+async def create_employee(user: UserCreate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
     if user.role != RoleEnum.employee:
         raise HTTPException(status_code=400, detail="Role must be employee")
-    existing = db.query(User).filter((User.username==user.username)|(User.email==user.email)).first()
+    existing = await db.scalar(select(User).where((User.username==user.username)|(User.email==user.email)))
     if existing:
         raise HTTPException(status_code=400, detail="Username or email already exists")
     db_user = User(
         name=user.name,
         username=user.username,
         email=user.email,
-        password_hash=hash_password(user.password),
+        password_hash=await hash_password_async(user.password),
         role=RoleEnum.employee,
         created_by_id=current_user.id
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    await db.commit()
+    # load created_by now: the response model nests it, and a lazy load while
+    # serializing would fail on an AsyncSession (or block the loop in sync mode)
+    return await db.scalar(select(User).options(joinedload(User.created_by)).where(User.id == db_user.id))
+
+@router.post("/import_employees")
+async def import_employees(request: Request, format: str = None, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    """Bulk-create employees from a streamed CSV (with header) or NDJSON request body.
+
+    The format comes from ?format=csv|ndjson or the Content-Type. Returns the
+    number imported and a per-row error report.
+    """
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv")
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    records = iter_records(iter_lines(request.stream()), fmt)
+    return await EmployeeImport(db, current_user.id).run(records)
 
 @router.post("/assign_task", response_model=TaskResponse)
-def assign_task(task: TaskCreate, db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    employee = db.query(User).filter(User.id==task.assigned_to_id, User.created_by_id==current_user.id).first()
+async def assign_task(task: TaskCreate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    employee = await db.scalar(select(User).where(User.id==task.assigned_to_id, User.created_by_id==current_user.id))
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     db_task = Task(
@@ -53,23 +69,62 @@ def assign_task(task: TaskCreate, db: Session = Depends(get_db), current_user: U
         assigned_by_id=current_user.id,
     )
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
-    send_email(employee.email, "New Task Assigned", f"You have been assigned a task: {db_task.title}")
+    queue_email(db, employee.email, "New Task Assigned", f"You have been assigned a task: {db_task.title}")
+    await db.commit()
+    await db.refresh(db_task)
     return db_task
 
+# most tasks accepted by one /assign_tasks call
+MAX_BATCH_TASKS = 1000
+
+@router.post("/assign_tasks", response_model=List[TaskResponse])
+async def assign_tasks(tasks: List[TaskCreate], db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    """Create many tasks at once; all-or-nothing if any target isn't on this manager's team."""
+    if not tasks:
+        return []
+    if len(tasks) > MAX_BATCH_TASKS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TASKS} tasks per request")
+
+    # every target checked against the team in one query
+    employee_ids = {t.assigned_to_id for t in tasks}
+    team = dict((await db.execute(
+        select(User.id, User.email).where(User.id.in_(employee_ids), User.created_by_id == current_user.id)
+    )).all())
+    missing = sorted(employee_ids - team.keys())
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Employees not found: {', '.join(map(str, missing))}")
+
+    # one multi-row INSERT ... RETURNING, rows back in request order
+    created = (await db.scalars(insert(Task).returning(Task, sort_by_parameter_order=True), [
+        {"title": t.title, "description": t.description, "assigned_to_id": t.assigned_to_id, "assigned_by_id": current_user.id}
+        for t in tasks
+    ])).all()
+
+    # one email per employee, however many tasks they were given
+    titles = {}
+    for task in created:
+        titles.setdefault(task.assigned_to_id, []).append(task.title)
+    for employee_id, employee_titles in titles.items():
+        subject = "New Task Assigned" if len(employee_titles) == 1 else f"{len(employee_titles)} New Tasks Assigned"
+        queue_email(db, team[employee_id], subject, "You have been assigned:\n" + "\n".join(f"- {t}" for t in employee_titles))
+    await db.commit()
+    # bulk inserts skip the ORM events that keep the admin stats fresh
+    dashboard_snapshot.invalidate()
+    return created
+
 @router.put("/reassign_task/{task_id}", response_model=TaskResponse)
-def reassign_task(task_id: int, new_employee_id: int, db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    task = db.query(Task).filter(Task.id==task_id, Task.assigned_by_id==current_user.id).first()
+async def reassign_task(task_id: int, new_employee_id: int, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    task = await db.scalar(select(Task).where(Task.id==task_id, Task.assigned_by_id==current_user.id))
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    new_employee = db.query(User).filter(User.id==new_employee_id, User.created_by_id==current_user.id).first()
+    new_employee = await db.scalar(select(User).where(User.id==new_employee_id, User.created_by_id==current_user.id))
     if not new_employee:
         raise HTTPException(status_code=404, detail="New employee not found")
     previous = task.assigned_to_id
     task.assigned_to_id = new_employee.id
-    db.commit()
-    db.refresh(task)
+    queue_email(db, new_employee.email, "Task Reassigned", f"You have been assigned a task: {task.title}")
+    await db.commit()
+    await db.refresh(task)
     # record reassign event for API call
     try:
         from app.models import TaskReassign
@@ -81,121 +136,193 @@ def reassign_task(task_id: int, new_employee_id: int, db: Session = Depends(get_
             reason=None
         )
         db.add(re)
-        db.commit()
+        await db.commit()
     except Exception:
-        db.rollback()
-    send_email(new_employee.email, "Task Reassigned", f"You have been assigned a task: {task.title}")
+        await db.rollback()
     return task
 
 @router.get("/employees_tasks")
-def view_employees_tasks(db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    employees = db.query(User).filter(User.created_by_id==current_user.id).all()
-    result = []
-    for emp in employees:
-        tasks = db.query(Task).filter(Task.assigned_to_id==emp.id).all()
-        result.append({"employee": emp, "tasks": tasks})
-    return result
+async def view_employees_tasks(db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    employees = (await db.scalars(select(User).where(User.created_by_id==current_user.id))).all()
+    # every employee's tasks in one query, grouped here; ordered by assignee so
+    # the planner looks each one up in an assigned_to_id index instead of
+    # walking the primary key across the whole table
+    tasks_by_employee = {emp.id: [] for emp in employees}
+    if employees:
+        stmt = select(Task).where(Task.assigned_to_id.in_(tasks_by_employee)).order_by(Task.assigned_to_id, Task.id)
+        tasks = (await db.scalars(stmt)).all()
+        for task in tasks:
+            tasks_by_employee[task.assigned_to_id].append(task)
+    return [{"employee": emp, "tasks": tasks_by_employee[emp.id]} for emp in employees]
+
+EMPLOYEE_FIELDS = set(EmployeeWithTasks.model_fields)
+
+def _status_count(status: TaskStatusEnum):
+    # correlated per employee; answered from ix_tasks_assigned_to_id_status
+    return (
+        select(func.count()).select_from(Task)
+        .where(Task.assigned_to_id == User.id, Task.status == status)
+        .correlate(User).scalar_subquery().label(status.value)
+    )
+
+@router.get("/employees", response_model=EmployeePage, response_model_exclude_unset=True)
+async def list_employees(cursor: str = None, limit: int = DEFAULT_PAGE_SIZE,
+                         status: List[TaskStatusEnum] = Query(None), fields: str = None,
+                         db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    """Page of this manager's employees, newest first, with task counts and nested tasks.
+
+    `status` (repeatable) limits the nested tasks; counts always cover every
+    status. `fields` is a comma-separated subset of the employee fields (id
+    is always returned); leaving out `tasks` skips loading them at all.
+    """
+    limit = clamp_page_size(limit)
+    wanted = {f.strip() for f in fields.split(",") if f.strip()} if fields else set(EMPLOYEE_FIELDS)
+    unknown = wanted - EMPLOYEE_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    wanted.add("id")
+
+    stmt = select(User).where(User.created_by_id == current_user.id)
+    if "task_counts" in wanted:
+        stmt = stmt.add_columns(*(_status_count(s) for s in TaskStatusEnum))
+    if "tasks" in wanted:
+        tasks_rel = User.tasks_received.and_(Task.status.in_(status)) if status else User.tasks_received
+        stmt = stmt.options(selectinload(tasks_rel))
+    stmt = apply_keyset(stmt, User.created_at, User.id, cursor).limit(limit + 1)
+    rows, next_cursor = split_page((await db.execute(stmt)).all(), limit, lambda r: (r[0].created_at, r[0].id))
+
+    items = []
+    for row in rows:
+        emp = row[0]
+        item = {f: getattr(emp, f) for f in wanted if f not in ("task_counts", "tasks")}
+        if "task_counts" in wanted:
+            item["task_counts"] = {s.value: getattr(row, s.value) for s in TaskStatusEnum}
+        if "tasks" in wanted:
+            item["tasks"] = sorted(emp.tasks_received, key=lambda t: t.id)
+        items.append(item)
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/tasks/search", response_model=TaskSearchPage)
+async def search_team_tasks(q: str = Query(..., min_length=1, max_length=200), status: List[TaskStatusEnum] = Query(None),
+                            assignee_id: int = None, page: int = Query(1, ge=1), limit: int = DEFAULT_PAGE_SIZE,
+                            db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    """Full-text search over the titles and descriptions of tasks held by this manager's team, best match first."""
+    limit = clamp_page_size(limit)
+    team = select(User.id).where(User.created_by_id == current_user.id)
+    items, next_page = await search_tasks(db, q, Task.assigned_to_id.in_(team), status=status,
+                                          assignee_id=assignee_id, page=page, limit=limit)
+    return {"items": items, "page": page, "next_page": next_page}
 
 # -------------------- HTML Routes --------------------
 
 @router.get("/dashboard", response_class=HTMLResponse)
-def manager_dashboard(request: Request, db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    # Team and task counts
-    total_employees = db.query(User).filter(User.created_by_id == current_user.id).count()
-    total_tasks = db.query(Task).filter(Task.assigned_by_id == current_user.id).count()
-    open_tasks = db.query(Task).filter(Task.assigned_by_id == current_user.id, Task.status != TaskStatusEnum.completed).count()
-
+async def manager_dashboard(request: Request, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    # "due today" depends on the date as well as the data
+    etag = await page_etag(request, db, current_user,
+                           watermark(Task, Task.assigned_by_id == current_user.id, updated_column=Task.updated_at),
+                           watermark(User, User.created_by_id == current_user.id),
+                           extra=(date.today(),))
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    # Team and task counts in one aggregate over this manager's tasks
     # Due today: approximate by tasks created today (no deadline field present)
-    today = date.today()
-    try:
-        due_today = db.query(Task).filter(func.date(Task.created_at) == today, Task.assigned_by_id == current_user.id).count()
-    except Exception:
-        # Some DBs don't support func.date; fallback to 0
-        due_today = 0
+    today_start = datetime.combine(date.today(), time.min)
+    counts = (await db.execute(
+        select(
+            func.count(Task.id).label("total"),
+            func.count(Task.id).filter(Task.status != TaskStatusEnum.completed).label("open"),
+            func.count(Task.id).filter(Task.created_at >= today_start, Task.created_at < today_start + timedelta(days=1)).label("due_today"),
+            func.count(Task.id).filter(Task.status == TaskStatusEnum.completed).label("completed"),
+            select(func.count()).select_from(User).where(User.created_by_id == current_user.id).scalar_subquery().label("team_size"),
+        ).where(Task.assigned_by_id == current_user.id)
+    )).one()
+    open_tasks = counts.open
 
     # On-time rate: completed / total assigned by this manager
-    completed = db.query(Task).filter(Task.assigned_by_id == current_user.id, Task.status == TaskStatusEnum.completed).count()
-    ontime_rate = int((completed / total_tasks) * 100) if total_tasks else 100
+    ontime_rate = int((counts.completed / counts.total) * 100) if counts.total else 100
 
     stats = {
-        "team_size": int(total_employees or 0),
+        "team_size": int(counts.team_size or 0),
         "open_tasks": int(open_tasks or 0),
-        "due_today": int(due_today or 0),
+        "due_today": int(counts.due_today or 0),
         "ontime_rate": int(ontime_rate),
     }
 
     # Recent tasks assigned by this manager
-    tasks = db.query(Task).options(joinedload(Task.assigned_to)).filter(Task.assigned_by_id == current_user.id).order_by(Task.created_at.desc()).limit(10).all()
+    tasks = (await db.scalars(select(Task).options(joinedload(Task.assigned_to)).where(Task.assigned_by_id == current_user.id).order_by(Task.created_at.desc()).limit(10))).all()
 
     # Simple alerts: too many open tasks or employees without tasks
     alerts = []
     if open_tasks > 10:
         alerts.append({"level": "warning", "message": f"{open_tasks} open tasks need attention"})
 
-    # find employees without any tasks (small teams acceptable to loop)
-    employees = db.query(User).filter(User.created_by_id == current_user.id).all()
-    no_task_emps = []
-    for emp in employees:
-        emp_tasks = db.query(Task).filter(Task.assigned_to_id == emp.id).count()
-        if emp_tasks == 0:
-            no_task_emps.append(emp.name)
+    # employees without any tasks: one anti-join, fetching one name past the five shown
+    no_task_emps = (await db.scalars(
+        select(User.name)
+        .where(User.created_by_id == current_user.id, ~exists().where(Task.assigned_to_id == User.id))
+        .order_by(User.id)
+        .limit(6)
+    )).all()
     if no_task_emps:
         alerts.append({"level": "info", "message": f"Employees with no tasks: {', '.join(no_task_emps[:5])}{'...' if len(no_task_emps)>5 else ''}"})
 
     return templates.TemplateResponse(
         "manager/dashboard.html",
-        {"request": request, "stats": stats, "tasks": tasks, "alerts": alerts, "user": current_user}
+        {"request": request, "stats": stats, "tasks": tasks, "alerts": alerts, "user": current_user},
+        headers=cache_headers(etag),
     )
 
 # HTML forms & redirects all paths prefixed properly
 @router.get("/create_employee/html", response_class=HTMLResponse)
-def create_employee_form(request: Request, current_user: User = Depends(manager_required)):
+async def create_employee_form(request: Request, current_user: Principal = Depends(manager_required)):
     return templates.TemplateResponse("manager/create_employee.html", {"request": request, "user": current_user})
 
 @router.post("/create_employee/html")
-def create_employee_html(request: Request, name: str = Form(...), username: str = Form(...), email: str = Form(...), password: str = Form(...), db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    existing = db.query(User).filter((User.username==username)|(User.email==email)).first()
+async def create_employee_html(request: Request, name: str = Form(...), username: str = Form(...), email: str = Form(...), password: str = Form(...), db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    existing = await db.scalar(select(User).where((User.username==username)|(User.email==email)))
     if existing:
         return templates.TemplateResponse("manager/create_employee.html", {"request": request, "error": "Username or email already exists", "user": current_user})
-    db_user = User(name=name, username=username, email=email, password_hash=hash_password(password), role=RoleEnum.employee, created_by_id=current_user.id)
+    db_user = User(name=name, username=username, email=email, password_hash=await hash_password_async(password), role=RoleEnum.employee, created_by_id=current_user.id)
     db.add(db_user)
-    db.commit()
+    await db.commit()
     return RedirectResponse(url="/manager/dashboard", status_code=303)
 
 # Assign Task HTML
 @router.get("/assign_task/html", response_class=HTMLResponse)
-def assign_task_form(request: Request, db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    employees = db.query(User).filter(User.created_by_id==current_user.id).all()
+async def assign_task_form(request: Request, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    employees = (await db.scalars(select(User).where(User.created_by_id==current_user.id))).all()
     return templates.TemplateResponse("manager/assign_task.html", {"request": request, "employees": employees, "user": current_user})
 
 @router.post("/assign_task/html")
-def assign_task_html(request: Request, employee_id: int = Form(...), title: str = Form(...), description: str = Form(...), db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    employee = db.query(User).filter(User.id==employee_id, User.created_by_id==current_user.id).first()
+async def assign_task_html(request: Request, employee_id: int = Form(...), title: str = Form(...), description: str = Form(...), db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    employee = await db.scalar(select(User).where(User.id==employee_id, User.created_by_id==current_user.id))
     if not employee:
         return templates.TemplateResponse("manager/assign_task.html", {"request": request, "error": "Employee not found", "user": current_user})
     db_task = Task(title=title, description=description, assigned_to_id=employee.id, assigned_by_id=current_user.id)
     db.add(db_task)
-    db.commit()
-    send_email(employee.email, "New Task Assigned", f"You have been assigned a task: {title}")
+    queue_email(db, employee.email, "New Task Assigned", f"You have been assigned a task: {title}")
+    await db.commit()
     return RedirectResponse(url="/manager/employees_tasks/html", status_code=303)
 
 @router.get("/reassign_task/html", response_class=HTMLResponse)
-def reassign_task_form(request: Request, db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    tasks = db.query(Task).filter(Task.assigned_by_id==current_user.id).all()
-    employees = db.query(User).filter(User.created_by_id==current_user.id).all()
+async def reassign_task_form(request: Request, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    tasks = (await db.scalars(select(Task).where(Task.assigned_by_id==current_user.id))).all()
+    employees = (await db.scalars(select(User).where(User.created_by_id==current_user.id))).all()
     return templates.TemplateResponse("manager/reassign_task.html", {"request": request, "tasks": tasks, "employees": employees, "user": current_user})
 
 @router.post("/reassign_task/html")
-def reassign_task_html(request: Request, task_id: int = Form(...), employee_id: int = Form(...), note: str = Form(None), db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    task = db.query(Task).filter(Task.id==task_id, Task.assigned_by_id==current_user.id).first()
+async def reassign_task_html(request: Request, task_id: int = Form(...), employee_id: int = Form(...), note: str = Form(None), db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    task = await db.scalar(select(Task).where(Task.id==task_id, Task.assigned_by_id==current_user.id))
     if not task:
         return templates.TemplateResponse("manager/reassign_task.html", {"request": request, "error": "Task not found", "user": current_user})
-    employee = db.query(User).filter(User.id==employee_id, User.created_by_id==current_user.id).first()
+    employee = await db.scalar(select(User).where(User.id==employee_id, User.created_by_id==current_user.id))
     if not employee:
         return templates.TemplateResponse("manager/reassign_task.html", {"request": request, "error": "Employee not found", "user": current_user})
     previous = task.assigned_to_id
     task.assigned_to_id = employee.id
-    db.commit()
+    queue_email(db, employee.email, "Task Reassigned", f"You have been assigned a task: {task.title}")
+    await db.commit()
     # record reassign event
     try:
         from app.models import TaskReassign
@@ -207,67 +334,89 @@ def reassign_task_html(request: Request, task_id: int = Form(...), employee_id:
             reason=(note or None)
         )
         db.add(re)
-        db.commit()
+        await db.commit()
     except Exception:
         # non-critical: proceed even if reassign history can't be written
-        db.rollback()
-    send_email(employee.email, "Task Reassigned", f"You have been assigned a task: {task.title}")
+        await db.rollback()
     return RedirectResponse(url="/manager/employees_tasks/html", status_code=303)
 
 @router.get("/task/{task_id}/delete")
-def delete_task(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    task = db.query(Task).filter(Task.id==task_id, Task.assigned_by_id==current_user.id).first()
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    task = await db.scalar(select(Task).where(Task.id==task_id, Task.assigned_by_id==current_user.id))
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    db.delete(task)
-    db.commit()
+    await db.delete(task)
+    await db.commit()
     return RedirectResponse(url="/manager/employees_tasks/html", status_code=303)
 
+TEAM_TASK_SORTS = {
+    "created": Task.created_at, "title": Task.title, "status": (task_status_sort, "status", TaskStatusEnum.pending),
+    "employee": (User.name, "assigned_to.name"),
+}
+
 @router.get("/employees_tasks/html", response_class=HTMLResponse)
-def employees_tasks_html(request: Request, db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    employees = db.query(User).filter(User.created_by_id==current_user.id).all()
-    tasks_list = []
-    for emp in employees:
-        tasks = db.query(Task).filter(Task.assigned_to_id==emp.id).all()
-        tasks_list.extend(tasks)
-    return templates.TemplateResponse("manager/employees_tasks.html", {"request": request, "tasks": tasks_list, "user": current_user})
+async def employees_tasks_html(request: Request, status: List[TaskStatusEnum] = Query(None), assignee_id: int = None,
+                               sort: str = None, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE,
+                               db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    limit = clamp_page_size(limit)
+    sort = SortOrder(TEAM_TASK_SORTS, Task.id, sort, default="-created")
+    # one query for the whole team: the assignee join both scopes the tasks and names them
+    stmt = (
+        select(Task).join(Task.assigned_to).options(contains_eager(Task.assigned_to))
+        .where(User.created_by_id == current_user.id)
+    )
+    if status:
+        stmt = stmt.where(Task.status.in_(status))
+    if assignee_id:
+        stmt = stmt.where(Task.assigned_to_id == assignee_id)
+    stmt = sort.apply(stmt, cursor).limit(limit + 1)
+    tasks_list, next_cursor = sort.split((await db.scalars(stmt)).all(), limit)
+    return templates.TemplateResponse("manager/employees_tasks.html", {
+        "request": request, "tasks": tasks_list, "user": current_user, "sort": sort,
+        "status": [s.value for s in status or ()], "statuses": list(TaskStatusEnum),
+        **page_links(request, next_cursor),
+    })
 
 
 # Manager: list employees under this manager
 @router.get("/employees/html", response_class=HTMLResponse)
-def manager_employees_html(request: Request, db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    employees = db.query(User).filter(User.created_by_id == current_user.id).order_by(User.created_at.desc()).all()
+async def manager_employees_html(request: Request, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    employees = (await db.scalars(select(User).where(User.created_by_id == current_user.id).order_by(User.created_at.desc()))).all()
     return templates.TemplateResponse("manager/employees.html", {"request": request, "employees": employees, "user": current_user})
 
 
 # Manager: delete an employee (only if they belong to manager's team)
 @router.get("/employee/{employee_id}/delete")
-def manager_delete_employee(employee_id: int, db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    emp = db.query(User).filter(User.id == employee_id, User.created_by_id == current_user.id).first()
+async def manager_delete_employee(employee_id: int, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    emp = await db.scalar(select(User).where(User.id == employee_id, User.created_by_id == current_user.id))
     if not emp:
         raise HTTPException(status_code=404, detail="Employee not found")
     # unassign tasks assigned to this employee
-    tasks = db.query(Task).filter(Task.assigned_to_id == emp.id).all()
+    tasks = (await db.scalars(select(Task).where(Task.assigned_to_id == emp.id))).all()
     for t in tasks:
         t.assigned_to_id = None
-    db.delete(emp)
-    db.commit()
+    await db.delete(emp)
+    await db.commit()
     return RedirectResponse(url="/manager/employees/html", status_code=303)
 
 
 @router.get("/reassign_history/html", response_class=HTMLResponse)
-def manager_reassign_history_html(request: Request, db: Session = Depends(get_db), current_user: User = Depends(manager_required)):
-    try:
-        from app.models import TaskReassign, Task, User
-        reassigns = db.query(TaskReassign).filter(TaskReassign.reassigned_by_id == current_user.id).order_by(TaskReassign.timestamp.desc()).limit(200).all()
-    except Exception:
-        reassigns = []
-
-    display = []
-    for r in reassigns:
-        task = db.query(Task).filter(Task.id == r.task_id).first()
-        prev = db.query(User).filter(User.id == r.previous_assignee_id).first()
-        new = db.query(User).filter(User.id == r.new_assignee_id).first()
-        display.append({"reassign": r, "task": task, "previous": prev, "new": new})
-
-    return templates.TemplateResponse("manager/reassign_history.html", {"request": request, "items": display, "user": current_user})
+async def manager_reassign_history_html(request: Request, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, start: str = None, end: str = None, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(manager_required)):
+    from app.models import TaskReassign
+    limit = clamp_page_size(limit)
+    stmt = select(TaskReassign).options(
+        joinedload(TaskReassign.task),
+        joinedload(TaskReassign.previous_assignee),
+        joinedload(TaskReassign.new_assignee),
+    ).where(TaskReassign.reassigned_by_id == current_user.id)
+    stmt = apply_date_range(stmt, TaskReassign.timestamp, start, end)
+    stmt = apply_keyset(stmt, TaskReassign.timestamp, TaskReassign.id, cursor).limit(limit + 1)
+    reassigns, next_cursor = split_page((await db.scalars(stmt)).all(), limit, lambda r: (r.timestamp, r.id))
+
+    display = [{"reassign": r, "task": r.task, "previous": r.previous_assignee, "new": r.new_assignee} for r in reassigns]
+
+    return templates.TemplateResponse("manager/reassign_history.html", {
+        "request": request, "items": display, "user": current_user,
+        "next_cursor": next_cursor, "limit": limit, "is_first_page": not cursor,
+        "start": start or "", "end": end or "",
+    })
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional
 from datetime import datetime
 from app.models import RoleEnum, TaskStatusEnum
 
@@ -21,6 +21,13 @@ class UserCreate(BaseModel):
     password: str
     role: RoleEnum
 
+class EmployeeImportRow(BaseModel):
+    """One record of a bulk employee upload (CSV row or NDJSON line)."""
+    name: str = Field(..., min_length=1)
+    username: str = Field(..., min_length=1)
+    email: EmailStr
+    password: str = Field(..., min_length=1)
+
 class UserResponse(BaseModel):
     id: int
     uuid: Optional[str] = None
@@ -59,6 +66,57 @@ class TaskResponse(BaseModel):
     class Config:
         orm_mode = True
 
+# ---------------- Manager team API ----------------
+class TaskSummary(BaseModel):
+    id: int
+    title: str
+    status: TaskStatusEnum
+    hours_spent: Optional[float] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class TaskStatusCounts(BaseModel):
+    pending: int = 0
+    in_progress: int = 0
+    completed: int = 0
+
+class EmployeeWithTasks(BaseModel):
+    # every field but id is optional so ?fields= can return a subset
+    id: int
+    uuid: Optional[str] = None
+    name: Optional[str] = None
+    username: Optional[str] = None
+    email: Optional[EmailStr] = None
+    created_at: Optional[datetime] = None
+    task_counts: Optional[TaskStatusCounts] = None
+    tasks: Optional[List[TaskSummary]] = None
+
+class EmployeePage(BaseModel):
+    items: List[EmployeeWithTasks]
+    next_cursor: Optional[str] = None
+
+# ---------------- Task search ----------------
+class TaskSearchHit(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    status: TaskStatusEnum
+    hours_spent: Optional[float] = None
+    assigned_to_id: Optional[int] = None
+    assigned_to_name: Optional[str] = None
+    assigned_by_id: Optional[int] = None
+    manager_name: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    rank: float
+
+class TaskSearchPage(BaseModel):
+    items: List[TaskSearchHit]
+    page: int
+    next_page: Optional[int] = None
+
 # ---------------- Task History ----------------
 class TaskHistoryResponse(BaseModel):
     id: int
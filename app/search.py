@@ -0,0 +1,107 @@
+import re
+
+from sqlalchemy import column, func, inspect, literal_column, or_, select, table, text
+from sqlalchemy.orm import aliased
+
+from app.database import engine
+from app.models import Task, User, task_search_vector
+
+# ---------------- Postgres: tsvector + GIN ----------------
+# Same expression as the ix_tasks_search_vector index (app.models).
+TASK_SEARCH_VECTOR = task_search_vector(Task.title, Task.description)
+_CONFIG = text("'english'::regconfig")
+
+
+# ---------------- SQLite: FTS5 ----------------
+# External-content FTS5 table over tasks, kept in step by triggers (which
+# also see Core bulk inserts).
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE tasks_fts USING fts5(title, description, content='tasks', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+]
+
+tasks_fts = table("tasks_fts", column("rowid"))
+
+
+def install_sqlite_fts(engine):
+    """Create the FTS5 table and triggers (and index existing tasks) if missing."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        if inspect(conn).has_table("tasks_fts"):
+            return
+        for statement in SQLITE_FTS_DDL:
+            conn.execute(text(statement))
+
+
+def _fts5_query(q: str) -> str:
+    # every word must appear (as a prefix); quoting keeps FTS5 syntax out of user input
+    words = re.findall(r"\w+", q)
+    return " ".join('"' + w.replace('"', '""') + '"*' for w in words)
+
+
+# ---------------- Search ----------------
+def task_search_statement(dialect: str, q: str, *where):
+    """(Task, manager name, assignee name, rank) rows matching `q`, best first.
+
+    Extra `where` clauses scope and filter the search. Dialects without a
+    full-text index fall back to a case-insensitive substring match.
+    """
+    Manager = aliased(User)
+    Employee = aliased(User)
+
+    if dialect == "postgresql":
+        query = func.websearch_to_tsquery(_CONFIG, q)
+        rank = func.ts_rank_cd(TASK_SEARCH_VECTOR, query)
+        match = TASK_SEARCH_VECTOR.op("@@")(query)
+    elif dialect == "sqlite":
+        # bm25() is lower-is-better; negate so every backend sorts rank descending
+        rank = -func.bm25(literal_column("tasks_fts"))
+        match = literal_column("tasks_fts").match(_fts5_query(q))
+    else:
+        rank = literal_column("0.0")
+        match = or_(Task.title.icontains(q, autoescape=True), Task.description.icontains(q, autoescape=True))
+
+    stmt = select(Task, Manager.name, Employee.name, rank.label("rank"))
+    if dialect == "sqlite":
+        stmt = stmt.join(tasks_fts, tasks_fts.c.rowid == Task.id)
+    return (
+        stmt.outerjoin(Manager, Manager.id == Task.assigned_by_id)
+        .outerjoin(Employee, Employee.id == Task.assigned_to_id)
+        .where(match, *where)
+        .order_by(literal_column("rank").desc(), Task.id.desc())
+    )
+
+
+async def search_tasks(db, q: str, *where, status=None, assignee_id: int = None, page: int = 1, limit: int = 50):
+    """One page of ranked hits as dicts, plus the next page number (or None)."""
+    if not _fts5_query(q):
+        # no words to look for (the box searches as you type, "!" included):
+        # nothing can match, and SQLite rejects an empty MATCH outright
+        return [], None
+    filters = list(where)
+    if status:
+        filters.append(Task.status.in_(status))
+    if assignee_id:
+        filters.append(Task.assigned_to_id == assignee_id)
+    stmt = task_search_statement(engine.dialect.name, q, *filters).offset((page - 1) * limit).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+
+    items = [
+        {"id": t.id, "title": t.title, "description": t.description, "status": t.status,
+         "hours_spent": t.hours_spent, "assigned_to_id": t.assigned_to_id, "assigned_to_name": employee_name,
+         "assigned_by_id": t.assigned_by_id, "manager_name": manager_name,
+         "created_at": t.created_at, "updated_at": t.updated_at, "rank": float(rank or 0)}
+        for t, manager_name, employee_name, rank in rows[:limit]
+    ]
+    return items, (page + 1 if len(rows) > limit else None)
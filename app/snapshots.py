@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.models import Task, User
+
+# seconds another worker may keep serving a snapshot after a change it didn't see
+SNAPSHOT_TTL = float(os.getenv("SNAPSHOT_TTL", "10"))
+
+_EMPTY = (None, 0.0)
+
+
+class Snapshot:
+    """In-process cached value dropped whenever a watched model is inserted or deleted.
+
+    The ORM after_insert/after_delete events invalidate it straight away and
+    again once the flushing session commits, so a reader that reloaded in
+    between doesn't keep pre-commit data. Writes that bypass the ORM (Core
+    bulk inserts) must call invalidate() themselves.
+
+    Those events only fire in the process that made the change, so every
+    value also expires `ttl` seconds after it was loaded: with several
+    workers, the others serve stale data for at most that long.
+    """
+
+    def __init__(self, *models, ttl: float = SNAPSHOT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entry = _EMPTY  # (value, monotonic expiry)
+        self._version = 0
+        self._key = f"snapshot_dirty_{id(self)}"
+        for model in models:
+            event.listen(model, "after_insert", self._on_change)
+            event.listen(model, "after_delete", self._on_change)
+        event.listen(Session, "after_commit", self._on_commit)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self):
+        """Cached value, or None when it needs to be rebuilt."""
+        value, expires = self._entry
+        return value if time.monotonic() < expires else None
+
+    def set(self, value, version: int):
+        # only keep the value if nothing changed while it was being loaded
+        with self._lock:
+            if version == self._version:
+                self._entry = (value, time.monotonic() + self.ttl)
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._entry = _EMPTY
+
+    def _on_change(self, mapper, connection, target):
+        self.invalidate()
+        session = object_session(target)
+        if session is not None:
+            session.info[self._key] = True
+
+    def _on_commit(self, session):
+        if session.info.pop(self._key, False):
+            self.invalidate()
+
+
+# Counts and recent managers on the admin dashboard only change when users or
+# tasks are added or removed, so it is served from this snapshot until then
+# (or until SNAPSHOT_TTL runs out, for changes made by other workers).
+dashboard_snapshot = Snapshot(User, Task)
@@ -0,0 +1,61 @@
+import os
+import time
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+from app.assets import static_url
+from app.fragments import FragmentCache, FragmentCacheExtension
+from app.querystats import record_render
+
+TEMPLATES_DIR = "templates"
+
+# 1 = production: compile every template at startup and never check the
+# files for changes again (a deploy restarts the workers anyway)
+TEMPLATES_PRECOMPILE = os.getenv("TEMPLATES_PRECOMPILE", "0").lower() in ("1", "true", "yes")
+# compiled template bytecode, shared by workers and kept across restarts;
+# blank uses a per-user directory under the system temp dir
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR") or None
+
+
+class TimedTemplate(Template):
+    """Adds each page render to the request's Server-Timing (render;dur)."""
+
+    def render(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            record_render(time.perf_counter() - started)
+
+
+def build_environment(auto_reload: bool = True, cache_dir: str = None, bytecode_cache: bool = True,
+                      fragments: FragmentCache = None) -> Environment:
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+        auto_reload=auto_reload,
+        # every template stays compiled in memory; there are only a few dozen
+        cache_size=-1,
+        bytecode_cache=FileSystemBytecodeCache(cache_dir) if bytecode_cache else None,
+        extensions=[FragmentCacheExtension],  # {% cache %} blocks, see app/fragments.py
+    )
+    env.template_class = TimedTemplate
+    if fragments is not None:
+        env.fragment_cache = fragments
+    env.globals["static"] = static_url
+    return env
+
+
+def precompile(env: Environment) -> int:
+    """Load (and so compile) every template under templates/ into the environment's cache."""
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+# the one environment every router renders with
+templates = Jinja2Templates(env=build_environment(auto_reload=not TEMPLATES_PRECOMPILE, cache_dir=TEMPLATE_CACHE_DIR))
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from jose import jwt, JWTError, ExpiredSignatureError
+
+# ---------------- JWT settings ----------------
+SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+# verified tokens remembered per process
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+
+# ---------------- Verification ----------------
+class TokenVerifier:
+    """Verifies JWTs and keeps a bounded LRU of the verified claims.
+
+    Entries are keyed by a SHA-256 digest of the token (so the cache never
+    holds bearer tokens) and only live until the token's exp; a hit skips
+    the HMAC check and JSON parsing. Revocation is checked separately, by
+    app.revocation, on every request.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._claims = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def decode(self, token: str) -> dict:
+        """Verified claims of `token`; raises JWTError if it is invalid or expired."""
+        key = self._key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._claims.get(key)
+            if entry is not None:
+                claims, exp = entry
+                if exp > now:
+                    self._claims.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                del self._claims[key]
+                raise ExpiredSignatureError("Signature has expired.")
+            self.misses += 1
+
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        exp = claims.get("exp")
+        if exp is not None and self.maxsize > 0:
+            with self._lock:
+                self._claims[key] = (claims, float(exp))
+                self._claims.move_to_end(key)
+                while len(self._claims) > self.maxsize:
+                    self._claims.popitem(last=False)
+        return claims
+
+    def clear(self):
+        with self._lock:
+            self._claims.clear()
+
+    def __len__(self):
+        return len(self._claims)
+
+
+def encode(claims: dict) -> str:
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+
+
+token_verifier = TokenVerifier()
@@ -0,0 +1,122 @@
+"""Statements and peak memory for /admin/tasks/html as the tasks table grows.
+
+Seeds a throwaway SQLite database in steps (default 1k, 10k, 100k tasks) and
+renders the first page and a deep page at each size. Both numbers should stay
+flat: the page is one keyset query whatever the table size.
+
+    python benchmarks/bench_all_tasks_page.py --sizes 1000 10000 100000
+"""
+import argparse
+import html
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_FILE}"
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+
+import main  # noqa: E402
+from app.auth import hash_password  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.models import RoleEnum, Task, User  # noqa: E402
+
+
+def seed_users():
+    db = SessionLocal()
+    admin = User(name="Admin", username="admin", email="admin@example.com",
+                 password_hash=hash_password("admin"), role=RoleEnum.admin)
+    db.add(admin)
+    db.flush()
+    manager = User(name="Manager", username="manager", email="manager@example.com",
+                   password_hash="x", role=RoleEnum.manager, created_by_id=admin.id)
+    db.add(manager)
+    db.flush()
+    employees = [User(name=f"Employee {i}", username=f"emp{i}", email=f"emp{i}@example.com",
+                      password_hash="x", role=RoleEnum.employee, created_by_id=manager.id) for i in range(50)]
+    db.add_all(employees)
+    db.commit()
+    ids = manager.id, [e.id for e in employees]
+    db.close()
+    return ids
+
+
+def grow_tasks(start: int, stop: int, manager_id: int, employee_ids):
+    base = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for chunk in range(start, stop, 10000):
+            conn.execute(insert(Task), [
+                {"title": f"Task {i}", "description": "benchmark", "assigned_by_id": manager_id,
+                 "assigned_to_id": employee_ids[i % len(employee_ids)], "hours_spent": 0.0,
+                 "created_at": base + timedelta(seconds=i), "updated_at": base + timedelta(seconds=i)}
+                for i in range(chunk, min(chunk + 10000, stop))
+            ])
+
+
+def measure(client, url: str):
+    statements = []
+    listener = lambda *args: statements.append(1)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    tracemalloc.start()
+    start = time.perf_counter()
+    resp = client.get(url)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    event.remove(engine, "before_cursor_execute", listener)
+    assert resp.status_code == 200, resp.text
+    return len(statements), peak / 1024, elapsed * 1000, resp
+
+
+NEXT_LINK = re.compile(r'<a [^>]*href="([^"]*)"[^>]*>Next page</a>')
+
+
+def next_cursor(resp) -> str:
+    """The cursor of the pager's "Next page" link (hrefs are HTML-escaped)."""
+    href = html.unescape(NEXT_LINK.search(resp.text).group(1))
+    return parse_qs(urlsplit(href).query)["cursor"][0]
+
+
+def page_url(cursor: str, limit: int) -> str:
+    return "/admin/tasks/html?" + urlencode({"cursor": cursor, "limit": limit})
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--deep-pages", type=int, default=20)
+    args = parser.parse_args()
+
+    manager_id, employee_ids = seed_users()
+    client = TestClient(main.app)
+    client.post("/login", data={"username": "admin", "password": "admin"})
+
+    print(f"{'tasks':>8} {'page':>6} {'stmts':>6} {'peak KiB':>10} {'ms':>8}")
+    seeded = 0
+    for size in sorted(args.sizes):
+        grow_tasks(seeded, size, manager_id, employee_ids)
+        seeded = size
+        url = f"/admin/tasks/html?limit={args.limit}"
+        stmts, peak, ms, resp = measure(client, url)
+        print(f"{size:>8} {'first':>6} {stmts:>6} {peak:>10.0f} {ms:>8.1f}")
+        # walk forward to a deep page and measure that one too
+        pages = min(args.deep_pages, size // args.limit - 2)
+        for _ in range(pages):
+            resp = client.get(page_url(next_cursor(resp), args.limit))
+        stmts, peak, ms, _ = measure(client, page_url(next_cursor(resp), args.limit))
+        print(f"{size:>8} {pages + 2:>6} {stmts:>6} {peak:>10.0f} {ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main_()
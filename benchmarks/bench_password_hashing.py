@@ -0,0 +1,67 @@
+"""Login throughput (bcrypt verifies/sec) as the password pool gets more cores.
+
+Runs the same burst of concurrent verifies through PasswordPool with 1, 2,
+4, ... up to --max-workers processes, plus the threadpool fallback
+(HASH_WORKERS=0) as a baseline. No database or server involved: this is
+the CPU-bound part of /token and /login.
+
+    BCRYPT_ROUNDS=12 python benchmarks/bench_password_hashing.py --logins 256
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.passwords import BCRYPT_ROUNDS, PasswordPool, pwd_context  # noqa: E402
+
+PASSWORD = "bench-password"
+
+
+async def burst(pool: PasswordPool, hashed: str, logins: int) -> float:
+    # warm the workers up so process start-up isn't counted
+    await asyncio.gather(*(pool.verify_and_update(PASSWORD, hashed) for _ in range(max(pool.workers, 1))))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(pool.verify_and_update(PASSWORD, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    assert all(valid for valid, _ in results)
+    return elapsed
+
+
+def worker_counts(max_workers: int):
+    counts, n = [], 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=128)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    hashed = pwd_context.hash(PASSWORD)
+    print(f"bcrypt rounds={BCRYPT_ROUNDS}, {args.logins} concurrent logins\n")
+    print(f"{'workers':>10} {'seconds':>9} {'logins/s':>10} {'speedup':>8}")
+
+    baseline = None
+    for workers in [0] + worker_counts(args.max_workers):
+        pool = PasswordPool(workers=workers, queue_limit=args.logins + max(workers, 1))
+        try:
+            elapsed = asyncio.run(burst(pool, hashed, args.logins))
+        finally:
+            pool.shutdown()
+        rate = args.logins / elapsed
+        baseline = baseline or rate
+        label = "threads" if workers == 0 else str(workers)
+        print(f"{label:>10} {elapsed:>9.2f} {rate:>10.1f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
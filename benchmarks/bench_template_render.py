@@ -0,0 +1,158 @@
+"""Render time of admin/all_tasks.html under each template setup.
+
+Renders the all-tasks page with --rows synthetic tasks (no database) and
+compares:
+
+  per-router   a fresh Jinja2Templates(directory="templates") like each
+               router used to build: no bytecode cache, reload checks on
+  shared       the shared environment with a bytecode cache (development)
+  precompiled  the shared environment in production mode: every template
+               compiled at startup, reload checks off
+  fragments    precompiled, with the row fragment cache warmed by a first
+               render, as on a list page whose rows haven't changed
+
+Fragment caching is off in the other setups, so they measure full renders.
+
+For each it prints the time to load the page's templates (parse and
+compile, or read them from the bytecode cache), the median render, and
+how many template files were stat()ed per render.
+
+    python benchmarks/bench_template_render.py --rows 10000
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from fastapi.templating import Jinja2Templates  # noqa: E402
+from jinja2 import Environment, FileSystemLoader  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.routing import Mount  # noqa: E402
+from starlette.staticfiles import StaticFiles  # noqa: E402
+
+from app.fragments import FragmentCache, FragmentCacheExtension  # noqa: E402
+from app.models import Task, TaskStatusEnum  # noqa: E402
+from app.pagination import SortOrder  # noqa: E402
+from app.assets import static_url  # noqa: E402
+from app.templating import build_environment, precompile  # noqa: E402
+
+TEMPLATE = "admin/all_tasks.html"
+
+
+def fake_request():
+    # just enough of an app for url_for('static', ...) in base.html
+    app = Starlette(routes=[Mount("/static", StaticFiles(directory="static"), name="static")])
+    return Request({
+        "type": "http", "app": app, "router": app.router, "method": "GET", "scheme": "http",
+        "server": ("localhost", 8000), "path": "/admin/tasks/html", "root_path": "",
+        "query_string": b"", "headers": [],
+    })
+
+
+def context(rows: int):
+    now = datetime.utcnow()
+    statuses = list(TaskStatusEnum)
+    tasks = [
+        SimpleNamespace(id=i, title=f"Task {i}", manager_name=f"Manager {i % 20}", assigned_to_name=f"Employee {i % 500}",
+                        status=statuses[i % 3], hours_spent=float(i % 8), created_at=now - timedelta(minutes=i),
+                        updated_at=now)
+        for i in range(rows)
+    ]
+    sort = SortOrder({"created": Task.created_at, "updated": Task.updated_at, "title": Task.title}, Task.id,
+                     default="-created")
+    return {"request": fake_request(), "tasks": tasks, "user": SimpleNamespace(username="admin", role="admin"),
+            "sort": sort, "status": [], "statuses": statuses, "first_url": None, "next_url": "/admin/tasks/html?cursor=x"}
+
+
+class StatCounter:
+    """Counts os.path.getmtime calls, which is how FileSystemLoader checks for edits."""
+
+    def __init__(self):
+        self.calls = 0
+        self._real = os.path.getmtime
+
+    def __enter__(self):
+        def counted(path):
+            self.calls += 1
+            return self._real(path)
+        os.path.getmtime = counted
+        return self
+
+    def __exit__(self, *exc):
+        os.path.getmtime = self._real
+
+
+def measure(label: str, templates: Jinja2Templates, ctx: dict, iterations: int):
+    env = templates.env
+    # load = parse + compile (or read bytecode) of the page, its base and its includes
+    start = time.perf_counter()
+    for name in (TEMPLATE, "base.html", "partials/pager.html", "partials/status_filter.html"):
+        env.get_template(name)
+    load = time.perf_counter() - start
+
+    timings = []
+    with StatCounter() as stats:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            env.get_template(TEMPLATE).render(ctx)
+            timings.append(time.perf_counter() - start)
+    print(f"{label:<28} {load * 1000:>10.2f} {statistics.median(timings) * 1000:>12.1f} "
+          f"{stats.calls / iterations:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    ctx = context(args.rows)
+    cache_dir = tempfile.mkdtemp(prefix="jinja-bench-")
+    try:
+        print(f"{TEMPLATE}, {args.rows} rows, {args.iterations} renders each\n")
+        print(f"{'setup':<28} {'load ms':>10} {'median ms':>12} {'stats/render':>14}")
+
+        def no_fragments():
+            return FragmentCache(maxsize=0)
+
+        per_router = Jinja2Templates(env=Environment(loader=FileSystemLoader("templates"), autoescape=True,
+                                                     extensions=[FragmentCacheExtension]))
+        per_router.env.globals["static"] = static_url
+        per_router.env.fragment_cache = no_fragments()
+        measure("per-router", per_router, ctx, args.iterations)
+
+        # empty bytecode cache: compiles, then writes the bytecode
+        measure("shared (cold bytecode)",
+                Jinja2Templates(env=build_environment(cache_dir=cache_dir, fragments=no_fragments())), ctx, args.iterations)
+        # what a restarted worker sees: loads bytecode instead of compiling
+        measure("shared (warm bytecode)",
+                Jinja2Templates(env=build_environment(cache_dir=cache_dir, fragments=no_fragments())), ctx, args.iterations)
+
+        production = Jinja2Templates(env=build_environment(auto_reload=False, cache_dir=cache_dir, fragments=no_fragments()))
+        start = time.perf_counter()
+        count = precompile(production.env)
+        print(f"{'  (precompile ' + str(count) + ' templates)':<28} {(time.perf_counter() - start) * 1000:>10.2f}")
+        measure("precompiled", production, ctx, args.iterations)
+
+        fragments = FragmentCache(maxsize=args.rows)
+        cached = Jinja2Templates(env=build_environment(auto_reload=False, cache_dir=cache_dir, fragments=fragments))
+        precompile(cached.env)
+        cached.env.get_template(TEMPLATE).render(ctx)  # fills the fragment cache
+        measure("fragments (warm)", cached, ctx, args.iterations)
+        print(f"\nfragment cache: {fragments.snapshot()}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Per-request JWT overhead with and without the verified-claims cache.
+
+A request used to verify its token twice with python-jose (the auth
+middleware, then get_current_user). With TokenVerifier both calls are
+dictionary lookups once the token has been seen. Prints microseconds
+per request for: the old double decode, a single uncached decode, and
+the cached path, over a pool of distinct live tokens.
+
+    python benchmarks/bench_token_verify.py --tokens 1000 --requests 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jose import jwt  # noqa: E402
+
+from app.auth import create_access_token  # noqa: E402
+from app.tokens import ALGORITHM, SECRET_KEY, TokenVerifier  # noqa: E402
+
+
+def per_request_us(fn, tokens, requests: int) -> float:
+    picks = [random.choice(tokens) for _ in range(requests)]
+    start = time.perf_counter()
+    for token in picks:
+        fn(token)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=1000, help="distinct users/sessions")
+    parser.add_argument("--requests", type=int, default=100000)
+    args = parser.parse_args()
+
+    tokens = [create_access_token({"sub": f"user{i}"}) for i in range(args.tokens)]
+
+    def jose_twice(token):
+        jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+    uncached = TokenVerifier(maxsize=0)
+    cached = TokenVerifier(maxsize=args.tokens)
+    for token in tokens:
+        cached.decode(token)
+
+    def cached_twice(token):
+        cached.decode(token)
+        cached.decode(token)
+
+    before = per_request_us(jose_twice, tokens, args.requests)
+    single = per_request_us(uncached.decode, tokens, args.requests)
+    after = per_request_us(cached_twice, tokens, args.requests)
+
+    print(f"{args.tokens} tokens, {args.requests} requests\n")
+    print(f"{'before (jose decode x2)':<28} {before:8.2f} us/request")
+    print(f"{'uncached decode x1':<28} {single:8.2f} us/request")
+    print(f"{'cached decode x2':<28} {after:8.2f} us/request   ({before / after:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
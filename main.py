@@ -1,16 +1,22 @@
 from fastapi import FastAPI, Depends, HTTPException, status, Request, Form
-from fastapi.templating import Jinja2Templates
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
-from jose import jwt, JWTError
-from app.auth import SECRET_KEY, ALGORITHM
-from app.database import Base, engine
-from app.models import User, RoleEnum
-from app.auth import verify_password, create_access_token
-from app.dependencies import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Base, engine, SessionLocal
+from app.models import RoleEnum
+from app.auth import authenticate_user, create_access_token, token_claims
+from app.passwords import password_pool
+from app.outbox import SMTP_HOST, outbox_sender
+from app.search import install_sqlite_fts
+from app.assets import static_app
+from app.compression import CompressionMiddleware
+from app.querystats import QueryStatsMiddleware
+from app.templating import TEMPLATES_PRECOMPILE, precompile, templates
+from app.dependencies import get_db, admin_required, RequestContext, Principal
+from app import metrics
+from app.revocation import revoked_tokens
+from app.tokens import token_verifier, JWTError
 
 # Routers
 from app.routes import admin, manager, employee
@@ -18,19 +24,16 @@ from app import auth  # auth router (logout)
 
 # ---------------- Create tables ----------------
 Base.metadata.create_all(bind=engine)
+install_sqlite_fts(engine)  # FTS5 table for task search on local sqlite runs
 
 # ---------------- FastAPI app ----------------
 app = FastAPI(title="Task Management System")
 
 # ---------------- Templates & Static ----------------
-# Use top-level templates/ and static/ directories so Jinja2 and StaticFiles
-# can find the files that live at the project root `templates/` and `static/`.
-templates = Jinja2Templates(directory="templates")
-# Mount static so templates can reference /static/... URLs
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-# Make the `static` url helper available in templates
-templates.env.globals['static'] = lambda path: f"/static/{path.lstrip('/')}"
+# Templates render through the shared environment in app/templating.py.
+# /static serves the fingerprinted, precompressed build from app/assets.py
+# (`python -m app.assets`) when there is one, else static/ as-is
+app.mount("/static", static_app(), name="static")
 
 # ---------------- Include Routers ----------------
 app.include_router(admin.router)  # prefix is already /admin in router
@@ -39,28 +42,69 @@ app.include_router(employee.router)  # prefix is already /employee
 app.include_router(auth.router)  # logout, etc.
 
 
+# ---------------- Startup ----------------
+@app.on_event("startup")
+def load_revoked_tokens():
+    # warm the in-memory revocation cache so get_current_user can skip the DB
+    db = SessionLocal()
+    try:
+        revoked_tokens.load(db)
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def precompile_templates():
+    # production mode: no template is parsed or stat()ed while serving
+    if TEMPLATES_PRECOMPILE:
+        precompile(templates.env)
+
+
+@app.on_event("startup")
+async def start_outbox_sender():
+    if SMTP_HOST:
+        outbox_sender.start()
+
+
+@app.on_event("shutdown")
+def stop_password_pool():
+    password_pool.shutdown()
+
+
+@app.on_event("shutdown")
+async def stop_outbox_sender():
+    await outbox_sender.stop()
+
+
 @app.post("/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(data=token_claims(user))
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+# ---------------- Metrics ----------------
+@app.get("/metrics")
+async def read_metrics(current_user: Principal = Depends(admin_required)):
+    """Connection pool counters and checkout wait-time histogram (admin only)."""
+    return metrics.snapshot()
+
+
 # ------------- Form login (HTML) -------------
 @app.post("/login")
-def login_form(request: Request, username: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == username).first()
-    if not user or not verify_password(password, user.password_hash):
+async def login_form(request: Request, username: str = Form(...), password: str = Form(...), db: AsyncSession = Depends(get_db)):
+    user = await authenticate_user(db, username, password)
+    if not user:
         # Return login page with error message and preserve username
         return templates.TemplateResponse("login.html", {"request": request, "error": "Incorrect username or password", "username": username}, status_code=401)
 
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(data=token_claims(user))
     # Choose redirect based on role
     if user.role == RoleEnum.admin:
         redirect_url = "/admin/dashboard"
@@ -76,32 +120,53 @@ def login_form(request: Request, username: str = Form(...), password: str = Form
 
 # ---------------- Login Page ----------------
 @app.get("/login", response_class=HTMLResponse)
-def show_login_page(request: Request):
+async def show_login_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
 # ---------------- Root ----------------
 @app.get("/")
-def read_root():
+async def read_root():
     # Redirect browser root to login page as the first route
     return RedirectResponse(url="/login")
 
+# registered before the middleware below, so it runs inside it and sees each
+# response as the route sent it: a plain body in one piece, a stream chunk by chunk
+app.add_middleware(CompressionMiddleware)
 
 
 @app.middleware("http")
 async def add_current_user_to_request(request: Request, call_next):
-    """Middleware to decode JWT cookie and attach user object to request.state"""
-    token = request.cookies.get("access_token")
+    """Middleware to open the request context, decode the JWT cookie and attach its principal to request.state"""
+    ctx = RequestContext()
+    request.state.ctx = ctx
     request.state.user = None
-    if token:
+    token = request.cookies.get("access_token")
+    if token and not request.url.path.startswith("/static"):
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            username = payload.get("sub")
-            if username:
-                db = next(get_db())
-                user = db.query(User).filter(User.username == username).first()
-                request.state.user = user
+            # claims only; revocation is enforced by the route dependencies
+            request.state.user = Principal.from_claims(token_verifier.decode(token))
         except JWTError:
             pass  # ignore expired/invalid token
-    response = await call_next(request)
+    try:
+        response = await call_next(request)
+    except Exception:
+        await ctx.close()
+        raise
+
+    # close the session only once the body has been sent, so streamed
+    # responses can keep using it
+    body_iterator = response.body_iterator
+
+    async def close_after_body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            await ctx.close()
+
+    response.body_iterator = close_after_body()
     return response
 
+
+# outermost: counts the queries of the whole request, auth middleware included
+app.add_middleware(QueryStatsMiddleware)
@@ -1,66 +1,115 @@
 (function(){
-  // Sorting for tables with .sortable
-  document.querySelectorAll('table.sortable').forEach(table => {
-    const ths = table.querySelectorAll('thead th');
-    ths.forEach((th, idx) => {
-      const type = th.getAttribute('data-sort') || 'string';
-      th.addEventListener('click', () => {
-        const current = th.classList.contains('asc') ? 'asc' : th.classList.contains('desc') ? 'desc' : null;
-        ths.forEach(h => h.classList.remove('asc','desc'));
-        const dir = current === 'asc' ? 'desc' : 'asc';
-        th.classList.add(dir);
-        const rows = Array.from(table.tBodies[0].rows);
-        const parse = (v) => type==='number' ? parseFloat(v) || 0 : v.toString().toLowerCase();
-        rows.sort((a,b) => {
-          const A = parse(a.cells[idx].textContent.trim());
-          const B = parse(b.cells[idx].textContent.trim());
-          return dir==='asc' ? (A>B?1:A<B?-1:0) : (A<B?1:A>B?-1:0);
-        });
-        rows.forEach(r => table.tBodies[0].appendChild(r));
-      });
+  // Sorting and filters are done by the server: headers with data-sort-key
+  // and selects with data-filter re-request the page with ?sort= / ?status=
+  // (starting again from the first page).
+  const reload = (changes) => {
+    const url = new URL(window.location.href);
+    Object.entries(changes).forEach(([k, v]) => v ? url.searchParams.set(k, v) : url.searchParams.delete(k));
+    url.searchParams.delete('cursor');
+    window.location.assign(url);
+  };
+
+  document.querySelectorAll('table.sortable th[data-sort-key]').forEach(th => {
+    th.addEventListener('click', () => {
+      const key = th.dataset.sortKey;
+      reload({ sort: th.classList.contains('asc') ? `-${key}` : key });
     });
   });
 
-  // Search filter for managers
-  const managerSearch = document.getElementById('managerSearch');
-  if (managerSearch) {
-    const table = document.getElementById('managersTable');
-    const run = () => {
-      const q = managerSearch.value.trim().toLowerCase();
-      table.querySelectorAll('tbody tr').forEach(row => {
-        const text = row.textContent.toLowerCase();
-        row.style.display = text.includes(q) ? '' : 'none';
-      });
-    };
-    managerSearch.addEventListener('input', window.tfDebounce(run, 120));
-  }
+  document.querySelectorAll('select[data-filter]').forEach(select => {
+    select.addEventListener('change', () => reload({ [select.dataset.filter]: select.value }));
+  });
 
-  // Search filter for employees tasks
-  const taskSearch = document.getElementById('taskSearch');
-  if (taskSearch) {
-    const table = document.getElementById('employeesTasksTable');
-    const run = () => {
-      const q = taskSearch.value.trim().toLowerCase();
-      table.querySelectorAll('tbody tr').forEach(row => {
-        const text = row.textContent.toLowerCase();
-        row.style.display = text.includes(q) ? '' : 'none';
-      });
-    };
-    taskSearch.addEventListener('input', window.tfDebounce(run, 120));
-  }
+  // Server-side task search: inputs with data-search-url fetch ranked results
+  // into the table named by data-search-table instead of filtering the DOM.
+  const text = (v) => v === null || v === undefined ? '' : String(v);
+  const stamp = (v) => text(v).slice(0, 16).replace('T', ' ');
+  const cell = (row, value) => { const td = row.insertCell(); td.textContent = text(value); return td; };
+  const link = (td, cls, href, label) => {
+    const a = document.createElement('a');
+    a.className = cls; a.href = href; a.textContent = label;
+    td.appendChild(a); td.appendChild(document.createTextNode(' '));
+    return a;
+  };
+  const renderers = {
+    employeesTasksTable: (row, t) => {
+      cell(row, t.assigned_to_name || '—');
+      cell(row, t.title);
+      cell(row, t.status);
+      cell(row, t.created_at);
+      const actions = cell(row, '');
+      actions.className = 'table-actions';
+      link(actions, 'btn small', `/manager/reassign_task/html?task_id=${t.id}`, 'Reassign');
+      link(actions, 'btn small danger', `/manager/task/${t.id}/delete`, 'Delete')
+        .addEventListener('click', (e) => { if (!confirm(`Delete task #${t.id}?`)) e.preventDefault(); });
+    },
+    allTasksTable: (row, t) => {
+      cell(row, t.id);
+      cell(row, t.title);
+      cell(row, t.manager_name || 'Unknown');
+      cell(row, t.assigned_to_name || 'Unassigned');
+      cell(row, t.status);
+      cell(row, t.hours_spent);
+      cell(row, stamp(t.created_at));
+      cell(row, stamp(t.updated_at));
+    },
+  };
+
+  document.querySelectorAll('input[data-search-url]').forEach(input => {
+    const table = document.getElementById(input.dataset.searchTable);
+    const render = table && renderers[table.id];
+    if (!render) return;
+    const body = table.tBodies[0];
+    const original = Array.from(body.rows);
+    const pager = input.dataset.searchPager ? document.getElementById(input.dataset.searchPager) : null;
+    const more = document.createElement('button');
+    more.type = 'button'; more.className = 'btn'; more.textContent = 'More results'; more.hidden = true;
+    table.parentNode.after(more);
+    let controller = null;
+    let nextPage = null;
 
-  // Employee task status filter
-  const statusFilter = document.getElementById('statusFilter');
-  if (statusFilter) {
-    const table = document.getElementById('myTasksTable');
+    const message = (msg) => {
+      const row = body.insertRow();
+      const td = cell(row, msg);
+      td.colSpan = table.tHead.rows[0].cells.length;
+      td.className = 'text-center';
+    };
+    const fetchPage = async (q, page) => {
+      if (controller) controller.abort();
+      controller = new AbortController();
+      const url = new URL(input.dataset.searchUrl, window.location.origin);
+      url.searchParams.set('q', q);
+      url.searchParams.set('page', page);
+      new URLSearchParams(window.location.search).getAll('status').forEach(v => url.searchParams.append('status', v));
+      try {
+        const resp = await fetch(url, { signal: controller.signal, credentials: 'same-origin' });
+        if (!resp.ok) throw new Error(resp.status);
+        const data = await resp.json();
+        if (page === 1) body.replaceChildren();
+        data.items.forEach(t => render(body.insertRow(), t));
+        if (page === 1 && !data.items.length) message('No matching tasks.');
+        nextPage = data.next_page;
+        more.hidden = !nextPage;
+      } catch (err) {
+        if (err.name === 'AbortError') return;
+        body.replaceChildren();
+        message('Search failed, please try again.');
+        more.hidden = true;
+      }
+    };
     const run = () => {
-      const v = statusFilter.value;
-      table.querySelectorAll('tbody tr').forEach(row => {
-        const st = row.getAttribute('data-status');
-        row.style.display = (v==='all' || v===st) ? '' : 'none';
-      });
+      const q = input.value.trim();
+      if (!q) {
+        if (controller) controller.abort();
+        body.replaceChildren(...original);
+        more.hidden = true;
+        if (pager) pager.hidden = false;
+        return;
+      }
+      if (pager) pager.hidden = true;
+      fetchPage(q, 1);
     };
-    statusFilter.addEventListener('change', run);
-    run();
-  }
+    more.addEventListener('click', () => { if (nextPage) fetchPage(input.value.trim(), nextPage); });
+    input.addEventListener('input', window.tfDebounce(run, 250));
+  });
 })();
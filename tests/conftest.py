@@ -0,0 +1,123 @@
+"""Shared fixtures: the app on a throwaway SQLite database.
+
+Run from the repository root with `python -m pytest`; `DB_ASYNC=1 python -m
+pytest` runs the same tests on the AsyncSession. TEST_DATABASE_URL points
+them at another (empty) database.
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix="tms-tests-")
+# set before the app is imported: these are read at import time
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{_tmp}/test.db")
+os.environ["SMTP_HOST"] = ""  # the outbox tests run their own sender
+os.environ.setdefault("HASH_WORKERS", "0")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("TEMPLATE_CACHE_DIR", os.path.join(_tmp, "jinja"))
+# a query per row fails the test instead of just logging
+os.environ.setdefault("N_PLUS_ONE", "raise")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import main  # noqa: E402
+from app.auth import hash_password  # noqa: E402
+from app.database import Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.fragments import fragment_cache  # noqa: E402
+from app.models import RoleEnum, Task, User  # noqa: E402
+from app.revocation import token_versions  # noqa: E402
+from app.snapshots import dashboard_snapshot  # noqa: E402
+
+PASSWORD = "pw"
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    """Every test starts from empty tables and empty in-process caches."""
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    # Core deletes bypass the ORM events these caches listen to
+    dashboard_snapshot.invalidate()
+    token_versions._versions.clear()  # ids are reused once the tables are emptied
+    fragment_cache.clear()
+    yield
+
+
+@pytest.fixture
+def users():
+    """admin, manager and two employees (emp0, emp1) of that manager, all with password PASSWORD."""
+    password_hash = hash_password(PASSWORD)
+    with SessionLocal() as db:
+        admin = User(name="Admin", username="admin", email="admin@example.com", password_hash=password_hash,
+                     role=RoleEnum.admin)
+        db.add(admin)
+        db.flush()
+        manager = User(name="Manager", username="manager", email="manager@example.com", password_hash=password_hash,
+                       role=RoleEnum.manager, created_by_id=admin.id)
+        db.add(manager)
+        db.flush()
+        employees = [
+            User(name=f"Employee {i}", username=f"emp{i}", email=f"emp{i}@example.com", password_hash=password_hash,
+                 role=RoleEnum.employee, created_by_id=manager.id)
+            for i in range(2)
+        ]
+        db.add_all(employees)
+        db.commit()
+        return {"admin": admin.id, "manager": manager.id, "emp0": employees[0].id, "emp1": employees[1].id}
+
+
+@pytest.fixture
+def tasks(users):
+    """Ten tasks from the manager, split between emp0 and emp1."""
+    with SessionLocal() as db:
+        rows = [
+            Task(title=f"Task {i}", description=f"Description {i}", assigned_by_id=users["manager"],
+                 assigned_to_id=users["emp0"] if i % 2 else users["emp1"])
+            for i in range(10)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return [task.id for task in rows]
+
+
+@pytest.fixture
+def login(users):
+    """login(username) -> TestClient holding that user's session cookie."""
+    def login(username: str) -> TestClient:
+        client = TestClient(main.app)
+        response = client.post("/login", data={"username": username, "password": PASSWORD}, follow_redirects=False)
+        assert response.status_code == 303, response.text
+        return client
+    return login
+
+
+@pytest.fixture
+def record_sql():
+    """with record_sql() as seen: statements the app ran, and connections it checked out, in the block."""
+    @contextmanager
+    def record_sql():
+        target = async_engine.sync_engine if async_engine is not None else engine  # the routers' engine
+        seen = {"statements": [], "checkouts": 0}
+
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            seen["statements"].append(statement)
+
+        def on_checkout(dbapi_conn, record, proxy):
+            seen["checkouts"] += 1
+
+        event.listen(target, "before_cursor_execute", on_execute)
+        event.listen(target.pool, "checkout", on_checkout)
+        try:
+            yield seen
+        finally:
+            event.remove(target, "before_cursor_execute", on_execute)
+            event.remove(target.pool, "checkout", on_checkout)
+    return record_sql
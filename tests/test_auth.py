@@ -0,0 +1,34 @@
+import re
+
+from app.revocation import token_versions
+
+USERS_SELECT = re.compile(r"^\s*SELECT\b.*\bFROM users\b", re.IGNORECASE | re.DOTALL)
+
+
+def users_selects(seen):
+    return [s for s in seen["statements"] if USERS_SELECT.search(s)]
+
+
+def test_one_user_lookup_and_one_session_per_request(login, record_sql):
+    client = login("emp0")
+    token_versions._versions.clear()  # a cold cache: the worst case
+    with record_sql() as seen:
+        response = client.get("/employee/dashboard")
+    assert response.status_code == 200, response.text
+    # middleware, get_db, get_principal and employee_required share it all
+    assert len(users_selects(seen)) == 1
+    assert seen["checkouts"] == 1
+
+
+def test_cached_token_version_needs_no_user_lookup(login, record_sql):
+    client = login("emp0")
+    client.get("/employee/dashboard")
+    with record_sql() as seen:
+        response = client.get("/employee/dashboard")
+    assert response.status_code == 200, response.text
+    assert users_selects(seen) == []
+
+
+def test_role_dependency_rejects_other_roles(login):
+    response = login("emp0").get("/admin/dashboard", follow_redirects=False)
+    assert response.status_code == 403
@@ -0,0 +1,51 @@
+import asyncio
+
+from app.imports import iter_lines
+
+HEADER = b"name,username,email,password\n"
+
+
+def collect_lines(*chunks):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [line async for line in iter_lines(stream())]
+    return asyncio.run(collect())
+
+
+def test_iter_lines_decodes_across_chunk_boundaries():
+    data = "\ufeffname\r\nJosé,Zoë\nlast".encode()
+    split = data.index("é".encode()) + 1  # inside the two-byte é
+    assert collect_lines(data[:split], data[split:]) == ["name", "José,Zoë", "last"]
+
+
+def test_iter_lines_rejects_only_the_undecodable_line():
+    assert collect_lines(b"ok\n\xff\xfe bad\nalso ok\n") == ["ok", None, "also ok"]
+
+
+def test_import_reports_invalid_utf8_rows(login):
+    body = HEADER + b"Ann,ann,ann@example.com,pw\nBad \xe9,bad,bad@example.com,pw\nBob,bob,bob@example.com,pw\n"
+    response = login("manager").post("/manager/import_employees", content=body, headers={"content-type": "text/csv"})
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["imported"] == 2
+    assert report["errors"] == [{"row": 3, "username": None, "error": "Not valid UTF-8 text"}]
+
+
+def test_import_rejects_an_undecodable_header(login):
+    response = login("manager").post("/manager/import_employees", content=b"n\xe4me,username,email,password\n",
+                                     headers={"content-type": "text/csv"})
+    assert response.status_code == 400
+    assert "UTF-8" in response.json()["detail"]
+
+
+def test_import_matches_existing_emails_case_insensitively(login):
+    # emp0@example.com already exists
+    body = HEADER + b"Clash,clash,EMP0@Example.COM,pw\nFresh,fresh,fresh@example.com,pw\n"
+    response = login("manager").post("/manager/import_employees", content=body, headers={"content-type": "text/csv"})
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["imported"] == 1
+    assert report["errors"] == [{"row": 2, "username": "clash", "error": "Username or email already exists"}]
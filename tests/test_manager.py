@@ -0,0 +1,18 @@
+def test_create_employee_returns_its_creator(login, users):
+    client = login("manager")
+    response = client.post("/manager/create_employee", json={
+        "name": "New Hire", "username": "newhire", "email": "newhire@example.com", "password": "pw", "role": "employee",
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["username"] == "newhire"
+    # nested in the response model: must be loaded before the handler returns
+    assert body["created_by"]["id"] == users["manager"]
+    assert body["created_by"]["username"] == "manager"
+
+
+def test_create_employee_rejects_other_roles(login):
+    response = login("manager").post("/manager/create_employee", json={
+        "name": "X", "username": "x", "email": "x@example.com", "password": "pw", "role": "manager",
+    })
+    assert response.status_code == 400
@@ -0,0 +1,38 @@
+from app.database import SessionLocal
+from app.models import RoleEnum, Task, User
+
+# page ETag watermarks, the aggregate counts, recent tasks, idle employees
+DASHBOARD_STATEMENTS = 4
+
+
+def add_team(manager_id: int, size: int):
+    """`size` more employees; every other one gets a task."""
+    with SessionLocal() as db:
+        for i in range(size):
+            employee = User(name=f"Extra {i}", username=f"extra{i}", email=f"extra{i}@example.com",
+                            password_hash="x", role=RoleEnum.employee, created_by_id=manager_id)
+            db.add(employee)
+            db.flush()
+            if i % 2:
+                db.add(Task(title=f"Extra task {i}", assigned_by_id=manager_id, assigned_to_id=employee.id))
+        db.commit()
+
+
+def dashboard_statements(client, record_sql):
+    client.get("/manager/dashboard")  # warms the token-version cache
+    with record_sql() as seen:
+        response = client.get("/manager/dashboard")
+    assert response.status_code == 200, response.text
+    return seen["statements"], response.text
+
+
+def test_manager_dashboard_statement_count_is_fixed(login, tasks, users, record_sql):
+    client = login("manager")
+    statements, _ = dashboard_statements(client, record_sql)
+    assert len(statements) == DASHBOARD_STATEMENTS, statements
+
+    # a team thirty times bigger costs the same
+    add_team(users["manager"], 60)
+    statements, page = dashboard_statements(client, record_sql)
+    assert len(statements) == DASHBOARD_STATEMENTS, statements
+    assert "Employees with no tasks: Extra 0, Extra 2, Extra 4, Extra 6, Extra 8..." in page
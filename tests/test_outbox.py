@@ -0,0 +1,140 @@
+import asyncio
+import socket
+from datetime import datetime
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app import outbox
+from app.database import SessionLocal, async_engine
+from app.models import EmailOutbox, OutboxStatusEnum
+from app.outbox import OutboxSender, queue_email
+
+
+class Mailbox:
+    """aiosmtpd handler that keeps what it receives; `fail` replies to refuse the next DATA commands with."""
+
+    def __init__(self, fail=()):
+        self.messages = []
+        self.fail = list(fail)
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail:
+            return self.fail.pop(0)
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    """start(handler) -> a running local SMTP server on `port`; stopped after the test."""
+    monkeypatch.setattr(outbox, "SMTP_STARTTLS", False)  # plain SMTP, like a local relay
+    port = free_port()
+    controllers = []
+
+    def start(handler):
+        controller = Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        controllers.append(controller)
+        return controller
+
+    start.port = port
+    yield start
+    for controller in controllers:
+        controller.stop()
+
+
+def queue(to="emp0@example.com", subject="New task assigned"):
+    with SessionLocal() as db:
+        queue_email(db, to, subject, "You have a new task.")
+        db.commit()
+
+
+def outbox_row():
+    with SessionLocal() as db:
+        return db.query(EmailOutbox).one()
+
+
+def make_due():
+    with SessionLocal() as db:
+        db.query(EmailOutbox).update({EmailOutbox.next_attempt_at: datetime.utcnow()})
+        db.commit()
+
+
+def drain(port: int) -> int:
+    sender = OutboxSender(host="127.0.0.1", port=port)
+
+    async def run():
+        try:
+            return await sender.drain_once()
+        finally:
+            await sender.stop()
+            if async_engine is not None:
+                await async_engine.dispose()  # its connections belong to this event loop
+    return asyncio.run(run())
+
+
+def test_queued_email_is_sent_and_marked_sent(smtp_server):
+    mailbox = Mailbox()
+    smtp_server(mailbox)
+    queue()
+
+    assert drain(smtp_server.port) == 1
+
+    row = outbox_row()
+    assert row.status == OutboxStatusEnum.sent
+    assert row.sent_at is not None and row.attempts == 0
+    [envelope] = mailbox.messages
+    assert envelope.rcpt_tos == ["emp0@example.com"]
+    assert b"Subject: New task assigned" in envelope.content
+    assert drain(smtp_server.port) == 0  # nothing left to claim
+
+
+def test_temporary_smtp_failure_is_retried(smtp_server):
+    mailbox = Mailbox(fail=["451 4.3.0 Try again later"])
+    smtp_server(mailbox)
+    queue()
+
+    drain(smtp_server.port)
+    row = outbox_row()
+    assert row.status == OutboxStatusEnum.pending
+    assert row.attempts == 1
+    assert "451" in row.last_error
+    assert row.next_attempt_at > datetime.utcnow()  # backed off
+    assert drain(smtp_server.port) == 0  # not due yet
+
+    make_due()
+    assert drain(smtp_server.port) == 1
+    row = outbox_row()
+    assert row.status == OutboxStatusEnum.sent
+    assert len(mailbox.messages) == 1
+
+
+def test_unreachable_server_is_retried_once_it_is_back(smtp_server):
+    queue()
+    drain(smtp_server.port)  # nothing listening yet
+    row = outbox_row()
+    assert row.status == OutboxStatusEnum.pending and row.attempts == 1
+
+    mailbox = Mailbox()
+    smtp_server(mailbox)
+    make_due()
+    drain(smtp_server.port)
+    assert outbox_row().status == OutboxStatusEnum.sent
+    assert len(mailbox.messages) == 1
+
+
+def test_permanent_smtp_failure_marks_the_email_dead(smtp_server):
+    smtp_server(Mailbox(fail=["550 5.1.1 No such mailbox"]))
+    queue()
+
+    drain(smtp_server.port)
+    row = outbox_row()
+    assert row.status == OutboxStatusEnum.dead
+    assert "550" in row.last_error
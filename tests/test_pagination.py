@@ -0,0 +1,142 @@
+import html
+import re
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+import pytest
+from sqlalchemy import insert
+
+from app.database import engine
+from app.models import RoleEnum, Task, TaskStatusEnum, User
+from app.pagination import MAX_PAGE_SIZE
+
+NEXT_LINK = re.compile(r'<a [^>]*href="([^"]*)"[^>]*>Next page</a>')
+START = datetime(2026, 1, 1, 12, 0)
+# NULL status / hours_spent sort as the column defaults, among the ties below
+STATUSES = [TaskStatusEnum.pending, None, TaskStatusEnum.in_progress, TaskStatusEnum.completed]
+HOURS = [1.5, None, 0.0, 1.5]
+
+# the id of each row, as each page renders it
+TASK_ROW = {
+    "/admin/tasks/html": re.compile(r"<tr>\s*<td>(\d+)</td>"),
+    "/manager/employees_tasks/html": re.compile(r"/manager/reassign_task/html\?task_id=(\d+)"),
+    "/employee/dashboard": re.compile(r"/employee/update_task/html/(\d+)"),
+}
+MANAGER_ROW = re.compile(r"/admin/manager/(\d+)/html")
+
+
+@pytest.fixture
+def sort_tasks(users):
+    """Sixteen tasks with ties on every sort column: four share each created_at,
+    titles repeat, and some have no status or hours."""
+    rows = [
+        {"title": f"Task {i % 3}", "assigned_by_id": users["manager"],
+         "assigned_to_id": users["emp0"] if i % 4 else users["emp1"],
+         "status": STATUSES[i // 2 % 4], "hours_spent": HOURS[i % 4],
+         "created_at": START + timedelta(minutes=i // 4), "updated_at": START + timedelta(minutes=i // 8)}
+        for i in range(16)
+    ]
+    with engine.begin() as conn:
+        return conn.execute(insert(Task).returning(Task.id), rows).scalars().all()
+
+
+def fetch(client, url: str, row: re.Pattern):
+    """(row ids on the page in order, its "Next page" link match)"""
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    ids = dict.fromkeys(int(row_id) for row_id in row.findall(response.text))  # a row may link its id twice
+    return list(ids), NEXT_LINK.search(response.text)
+
+
+def walk(client, path: str, params: dict, row: re.Pattern) -> list:
+    """Row ids across every page of three, following the "Next page" links."""
+    url, ids = f"{path}?{urlencode({**params, 'limit': 3})}", []
+    while url:
+        page, next_link = fetch(client, url, row)
+        assert len(page) <= 3
+        ids += page
+        url = html.unescape(next_link.group(1)) if next_link else None
+    return ids
+
+
+def assert_pages(client, path: str, params: dict, row: re.Pattern, count: int):
+    """Paging matches one page holding every row: nothing repeated, nothing skipped."""
+    whole, next_link = fetch(client, f"{path}?{urlencode({**params, 'limit': MAX_PAGE_SIZE})}", row)
+    assert next_link is None
+    assert len(whole) == len(set(whole)) == count
+    assert walk(client, path, params, row) == whole
+    return whole
+
+
+def in_order(ids: list, rows: dict, key, descending: bool) -> bool:
+    keys = [(key(rows[row_id]), row_id) for row_id in ids]
+    return keys == sorted(keys, reverse=descending)
+
+
+def load_tasks(ids):
+    with engine.connect() as conn:
+        return {row.id: row for row in conn.execute(Task.__table__.select().where(Task.id.in_(ids)))}
+
+
+TASK_KEYS = {
+    "created": lambda task: task.created_at,
+    "updated": lambda task: task.updated_at,
+    "title": lambda task: task.title,
+    "hours": lambda task: task.hours_spent or 0.0,
+}
+
+
+@pytest.mark.parametrize("sort", [None, "created", "title", "-title", "-updated"])
+def test_admin_tasks_pages(login, sort_tasks, sort):
+    params = {"sort": sort} if sort else {}
+    ids = assert_pages(login("admin"), "/admin/tasks/html", params, TASK_ROW["/admin/tasks/html"], 16)
+    sort = sort or "-created"
+    assert in_order(ids, load_tasks(ids), TASK_KEYS[sort.lstrip("-")], sort.startswith("-"))
+
+
+@pytest.mark.parametrize("sort", [None, "title", "status", "-status", "employee", "-employee"])
+def test_manager_team_tasks_pages(login, sort_tasks, sort):
+    params = {"sort": sort} if sort else {}
+    ids = assert_pages(login("manager"), "/manager/employees_tasks/html", params,
+                       TASK_ROW["/manager/employees_tasks/html"], 16)
+    if sort in (None, "title"):
+        key = TASK_KEYS["title" if sort else "created"]
+        assert in_order(ids, load_tasks(ids), key, descending=sort is None)
+
+
+@pytest.mark.parametrize("sort", [None, "created", "title", "status", "-status", "hours", "-hours"])
+def test_employee_dashboard_pages(login, sort_tasks, sort):
+    params = {"sort": sort} if sort else {}
+    ids = assert_pages(login("emp0"), "/employee/dashboard", params, TASK_ROW["/employee/dashboard"], 12)
+    sort = sort or "-created"
+    if sort.lstrip("-") in TASK_KEYS:
+        assert in_order(ids, load_tasks(ids), TASK_KEYS[sort.lstrip("-")], sort.startswith("-"))
+
+
+def test_null_status_pages_as_pending(login, sort_tasks):
+    tasks = load_tasks(sort_tasks)
+    ids = walk(login("emp0"), "/employee/dashboard", {"sort": "status"}, TASK_ROW["/employee/dashboard"])
+    pending = [row_id for row_id in ids if tasks[row_id].status in (None, TaskStatusEnum.pending)]
+    assert any(tasks[row_id].status is None for row_id in pending)
+    # NULL and pending rows are one run in id order, wherever the dialect sorts "pending"
+    start = ids.index(pending[0])
+    assert ids[start:start + len(pending)] == sorted(pending)
+
+
+@pytest.mark.parametrize("sort", [None, "-name", "email", "created", "-created"])
+def test_admin_managers_pages(login, users, sort):
+    rows = [
+        {"name": "Manager", "username": f"manager{i}", "email": f"manager{i % 5}-{i}@example.com",
+         "password_hash": "x", "role": RoleEnum.manager, "created_by_id": users["admin"],
+         "created_at": START + timedelta(minutes=i // 4)}
+        for i in range(10)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(User), rows)
+    params = {"sort": sort} if sort else {}
+    ids = assert_pages(login("admin"), "/admin/managers/html", params, MANAGER_ROW, 11)
+    sort = sort or "name"
+    with engine.connect() as conn:
+        managers = {row.id: row for row in conn.execute(User.__table__.select().where(User.id.in_(ids)))}
+    key = {"name": lambda m: m.name, "email": lambda m: m.email, "created": lambda m: m.created_at}[sort.lstrip("-")]
+    assert in_order(ids, managers, key, sort.startswith("-"))
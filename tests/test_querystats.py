@@ -0,0 +1,90 @@
+import logging
+import re
+
+import pytest
+from sqlalchemy import select, update
+
+from app import querystats
+from app.database import SessionLocal
+from app.models import User
+from app.querystats import QueryStats, RepeatedQueryError, current_stats, statement_shape
+
+
+@pytest.mark.parametrize("statement, shape", [
+    # placeholder styles: qmark, pyformat, numeric (asyncpg), named
+    ("SELECT name FROM users WHERE id = ?", "SELECT name FROM users WHERE id = ?"),
+    ("SELECT name FROM users WHERE id = %(id_1)s", "SELECT name FROM users WHERE id = ?"),
+    ("SELECT name FROM users WHERE id = $1", "SELECT name FROM users WHERE id = ?"),
+    ("SELECT name FROM users WHERE id = :id", "SELECT name FROM users WHERE id = ?"),
+    # inlined literals, including quotes inside strings
+    ("SELECT name FROM users WHERE id = 42 AND name = 'O''Brien'", "SELECT name FROM users WHERE id = ? AND name = ?"),
+    # IN lists of any length, and whitespace
+    ("SELECT name\n  FROM users WHERE id IN (?, ?, ?)", "SELECT name FROM users WHERE id IN (?)"),
+    ("SELECT name FROM users WHERE id IN ($1,$2)", "SELECT name FROM users WHERE id IN (?)"),
+    # casts and column names with digits are not parameters
+    ("SELECT a1::text FROM t2 LIMIT 10", "SELECT a1::text FROM t2 LIMIT ?"),
+])
+def test_statement_shape(statement, shape):
+    assert statement_shape(statement) == shape
+
+
+@pytest.fixture
+def request_stats():
+    stats = QueryStats("GET /test")
+    token = current_stats.set(stats)
+    yield stats
+    current_stats.reset(token)
+
+
+def lookup_names(count: int):
+    with SessionLocal() as db:
+        for user_id in range(1, count + 1):
+            db.execute(select(User.name).where(User.id == user_id))
+
+
+def test_repeated_select_raises_at_the_threshold(monkeypatch, request_stats):
+    monkeypatch.setattr(querystats, "N_PLUS_ONE", "raise")
+    lookup_names(querystats.N_PLUS_ONE_THRESHOLD - 1)
+    assert request_stats.count == querystats.N_PLUS_ONE_THRESHOLD - 1
+    with pytest.raises(RepeatedQueryError, match=r"GET /test: same query .*users\.id = \?"):
+        lookup_names(querystats.N_PLUS_ONE_THRESHOLD)
+
+
+def test_repeated_select_is_logged_in_log_mode(monkeypatch, request_stats, caplog):
+    monkeypatch.setattr(querystats, "N_PLUS_ONE", "log")
+    with caplog.at_level(logging.WARNING, logger="app.querystats"):
+        lookup_names(querystats.N_PLUS_ONE_THRESHOLD * 2)
+    # reported once, when the threshold is reached
+    assert [r.getMessage() for r in caplog.records if "N+1" in r.getMessage()] == [
+        f"GET /test: same query {querystats.N_PLUS_ONE_THRESHOLD} times (N+1?): "
+        "SELECT users.name FROM users WHERE users.id = ?"
+    ]
+
+
+def test_repeated_writes_are_not_flagged(monkeypatch, request_stats, users):
+    monkeypatch.setattr(querystats, "N_PLUS_ONE", "raise")
+    with SessionLocal() as db:
+        for i in range(querystats.N_PLUS_ONE_THRESHOLD * 2):
+            db.execute(update(User).where(User.id == users["emp0"]).values(name=f"Renamed {i}"))
+        db.commit()
+
+
+def test_statements_outside_a_request_are_not_counted(monkeypatch):
+    monkeypatch.setattr(querystats, "N_PLUS_ONE", "raise")
+    lookup_names(querystats.N_PLUS_ONE_THRESHOLD * 2)
+
+
+SERVER_TIMING = re.compile(r'^db;dur=(\d+\.\d\d);count=(\d+);desc="\d+ quer(?:y|ies)", render;dur=(\d+\.\d\d)$')
+
+
+def test_server_timing_header_on_a_page(login, tasks, record_sql):
+    client = login("admin")
+    client.get("/admin/tasks/html")  # warms the token-version cache
+    with record_sql() as seen:
+        response = client.get("/admin/tasks/html")
+    assert response.status_code == 200, response.text
+    match = SERVER_TIMING.match(response.headers["server-timing"])
+    assert match, response.headers["server-timing"]
+    db_ms, count, render_ms = float(match[1]), int(match[2]), float(match[3])
+    assert count == len(seen["statements"]) > 0
+    assert db_ms > 0 and render_ms > 0
@@ -0,0 +1,23 @@
+import pytest
+
+
+@pytest.mark.parametrize("q", ["!", "--", '"', "*", "()"])
+def test_punctuation_only_query_returns_an_empty_page(login, tasks, q):
+    for username, url in (("admin", "/admin/tasks/search"), ("manager", "/manager/tasks/search")):
+        response = login(username).get(url, params={"q": q})
+        assert response.status_code == 200, response.text
+        assert response.json() == {"items": [], "page": 1, "next_page": None}
+
+
+def test_search_ranks_matching_tasks(login, tasks):
+    response = login("admin").get("/admin/tasks/search", params={"q": "descr 3"})
+    assert response.status_code == 200, response.text
+    assert [hit["title"] for hit in response.json()["items"]] == ["Task 3"]
+
+
+def test_manager_search_is_limited_to_the_team(login, tasks, users):
+    response = login("manager").get("/manager/tasks/search", params={"q": "task", "assignee_id": users["emp0"]})
+    assert response.status_code == 200, response.text
+    items = response.json()["items"]
+    assert len(items) == 5
+    assert {hit["assigned_to_id"] for hit in items} == {users["emp0"]}
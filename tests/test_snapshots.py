@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+from sqlalchemy import insert
+
+from app import snapshots
+from app.database import engine
+from app.models import RoleEnum, User
+from app.snapshots import Snapshot, dashboard_snapshot
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_snapshot_expires_after_its_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(snapshots, "time", SimpleNamespace(monotonic=clock))  # this module's clock only
+    snapshot = Snapshot(ttl=10)
+
+    snapshot.set({"n": 1}, snapshot.version)
+    clock.now += 9.9
+    assert snapshot.get() == {"n": 1}
+    clock.now += 0.1
+    assert snapshot.get() is None
+
+
+def test_snapshot_ignores_values_loaded_before_an_invalidation():
+    snapshot = Snapshot(ttl=10)
+    version = snapshot.version
+    snapshot.invalidate()  # a change landed while the value was being loaded
+    snapshot.set({"n": 1}, version)
+    assert snapshot.get() is None
+
+
+def test_dashboard_picks_up_another_workers_changes_within_the_ttl(login, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(snapshots, "time", SimpleNamespace(monotonic=clock))  # this module's clock only
+    client = login("admin")
+    assert client.get("/admin/dashboard").status_code == 200
+    assert dashboard_snapshot.get()["total_employees"] == 2
+
+    # a Core insert fires none of this process's ORM events, like a write from another worker
+    with engine.begin() as conn:
+        conn.execute(insert(User).values(name="Elsewhere", username="elsewhere", email="elsewhere@example.com",
+                                         password_hash="x", role=RoleEnum.employee))
+    client.get("/admin/dashboard")
+    assert dashboard_snapshot.get()["total_employees"] == 2  # still the cached stats
+
+    clock.now += dashboard_snapshot.ttl
+    client.get("/admin/dashboard")
+    assert dashboard_snapshot.get()["total_employees"] == 3